@@ -0,0 +1,249 @@
+"""Response compression middleware: zstd / brotli / gzip negotiation.
+
+Only buffered, compressible responses (JSON, text) above a size threshold are
+compressed; SSE streams, images and already-encoded bodies pass through
+untouched. Compressed bodies are kept in a small LRU keyed by a digest of the
+uncompressed body + encoding, so a list page that is requested repeatedly
+(same filters, unchanged data) is compressed once and served from memory.
+
+brotli and zstandard are optional: when the module is missing, that encoding
+is simply never negotiated and gzip (stdlib) is used.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MINIMUM_SIZE = 1024
+CACHE_ENTRIES = 256
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+_NEVER_COMPRESS = ("text/event-stream",)
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_br(body: bytes) -> bytes:
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def _compress_zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+
+# Server preference order; an encoding is only offered when its codec loaded.
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _compress_zstd
+if brotli is not None:
+    ENCODERS["br"] = _compress_br
+ENCODERS["gzip"] = _compress_gzip
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred encoding the client accepts (q > 0), or None."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    wildcard = accepted.get("*", 0.0)
+    for name in ENCODERS:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+class CompressionStats:
+    """Process-wide counters exposed via /v1/admin/compression/stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_ms = 0.0
+        self.by_encoding: dict[str, int] = {}
+
+    def record(self, encoding: str, size_in: int, size_out: int, elapsed_ms: float, cache_hit: bool):
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += size_in
+            self.bytes_out += size_out
+            self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+            if cache_hit:
+                self.cache_hits += 1
+            else:
+                self.compress_ms += elapsed_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            compressed = self.responses - self.cache_hits
+            return {
+                "encodings_available": list(ENCODERS),
+                "minimum_size": MINIMUM_SIZE,
+                "responses": self.responses,
+                "cache_hits": self.cache_hits,
+                "cache_entries": len(_cache),
+                "by_encoding": dict(self.by_encoding),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                "compress_ms_total": round(self.compress_ms, 1),
+                "compress_ms_avg": round(self.compress_ms / compressed, 3) if compressed else None,
+            }
+
+
+stats = CompressionStats()
+
+
+class _CompressedCache:
+    """LRU of compressed bodies keyed by (body digest, encoding)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[bytes, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value: bytes):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = _CompressedCache(CACHE_ENTRIES)
+
+
+def compress_cached(body: bytes, encoding: str) -> bytes:
+    """Compress `body`, reusing a previous result for an identical body."""
+    key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+    cached = _cache.get(key)
+    if cached is not None:
+        stats.record(encoding, len(body), len(cached), 0.0, cache_hit=True)
+        return cached
+
+    t0 = time.perf_counter()
+    out = ENCODERS[encoding](body)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    _cache.put(key, out)
+    stats.record(encoding, len(body), len(out), elapsed_ms, cache_hit=False)
+    return out
+
+
+def _is_compressible(headers: list[tuple[bytes, bytes]]) -> bool:
+    content_type = ""
+    for k, v in headers:
+        name = k.lower()
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = v.decode("latin-1").lower()
+    if any(content_type.startswith(t) for t in _NEVER_COMPRESS):
+        return False
+    return any(content_type.startswith(t) for t in _COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; buffers compressible bodies and encodes them once."""
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for k, v in scope.get("headers") or []:
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                if not _is_compressible(message.get("headers") or []):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = [
+                (k, v) for k, v in start_message.get("headers") or []
+                if k.lower() != b"content-length"
+            ]
+            if len(body) >= self.minimum_size:
+                body = compress_cached(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"vary", b"Accept-Encoding"))
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,122 @@
+"""Snapshot-cached dashboard counters (migrations/015_dashboard_snapshots.sql).
+
+get(db, key) returns the stored JSON for a counter set plus its as_of
+time. A snapshot older than SNAPSHOT_TTL_SEC is still served, and a
+background thread recomputes it (stale-while-revalidate). Only the very
+first read of a key computes inline. A transaction-scoped advisory lock
+keeps concurrent API processes from recomputing the same key at once.
+"""
+
+import json
+import logging
+import threading
+
+from db import connection_pool
+
+logger = logging.getLogger("dashboard_snapshot")
+
+SNAPSHOT_TTL_SEC = 60
+
+
+def _compute_stats(cur) -> dict:
+    cur.execute("SELECT COUNT(*), MAX(last_synced_at) FROM eh_galleries")
+    total, last_synced = cur.fetchone()
+
+    cur.execute("SELECT category, COUNT(*) FROM eh_galleries GROUP BY category")
+    by_category = {row[0]: row[1] for row in cur.fetchall() if row[0]}
+
+    return {
+        "total_galleries": total,
+        "by_category": by_category,
+        "last_synced_at": last_synced.isoformat() if last_synced else None,
+    }
+
+
+def _compute_embeddings_status(cur) -> dict:
+    cur.execute(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM tag_vocabulary WHERE is_active = TRUE),
+            (SELECT dim_count FROM tag_vocabulary_meta WHERE id = 1),
+            (SELECT COUNT(*) FROM eh_galleries WHERE is_active = TRUE),
+            (SELECT COUNT(*) FROM recommended_cache rc JOIN eh_galleries g ON g.gid = rc.gid
+              WHERE g.is_active = TRUE AND rc.tag_embedding IS NOT NULL),
+            (SELECT COUNT(*) FROM recommended_cache rc JOIN eh_galleries g ON g.gid = rc.gid
+              WHERE g.is_active = TRUE AND rc.tag_embedding IS NULL),
+            (SELECT liked_count FROM user_profile WHERE id = 1),
+            (SELECT embedding IS NOT NULL FROM user_profile WHERE id = 1)
+        """
+    )
+    vocab_size, dim_count, total_g, embedded, pending, liked, ready = cur.fetchone()
+    return {
+        "vocab_size": vocab_size or 0,
+        "dim_count": dim_count or 0,
+        "total_galleries": total_g or 0,
+        "embedded_count": embedded or 0,
+        "pending_count": pending or 0,
+        "profile_liked_count": liked or 0,
+        "profile_ready": bool(ready),
+    }
+
+
+COMPUTERS = {
+    "stats": _compute_stats,
+    "embeddings_status": _compute_embeddings_status,
+}
+
+UPSERT_SQL = """
+    INSERT INTO dashboard_snapshots (key, value, as_of)
+    VALUES (%s, %s::jsonb, NOW())
+    ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, as_of = EXCLUDED.as_of
+    RETURNING as_of
+"""
+
+_refreshing: set[str] = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh(key: str) -> None:
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_xact_lock(hashtext('dashboard_snapshot:' || %s))", (key,))
+            if cur.fetchone()[0]:
+                cur.execute(UPSERT_SQL, (key, json.dumps(COMPUTERS[key](cur))))
+        conn.commit()
+    except Exception as e:
+        logger.error(f"snapshot {key} refresh failed: {e}")
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _refresh_in_background(key: str) -> None:
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(target=_refresh, args=(key,), name=f"snapshot-{key}", daemon=True).start()
+
+
+def get(db, key: str):
+    """(value, as_of) for a snapshot key; stale values trigger a background
+    refresh, a missing key is computed inline."""
+    db.execute(
+        """
+        SELECT value, as_of, as_of < NOW() - make_interval(secs => %s)
+        FROM dashboard_snapshots WHERE key = %s
+        """,
+        (SNAPSHOT_TTL_SEC, key),
+    )
+    row = db.fetchone()
+    if row is None:
+        value = COMPUTERS[key](db)
+        db.execute(UPSERT_SQL, (key, json.dumps(value)))
+        return value, db.fetchone()[0]
+
+    value, as_of, stale = row
+    if stale:
+        _refresh_in_background(key)
+    return value, as_of
@@ -0,0 +1,167 @@
+"""Fan-out of sync_task_events to admin SSE clients.
+
+One broker per API process replaces the per-client 5 s polling loop:
+
+  - sync_task_events inserts send NOTIFY sync_task_events with the new id
+    (migrations/017_task_events_notify.sql). The pg_listener thread fetches
+    that row once and hands it to the event loop, which puts it on every
+    subscriber's asyncio queue.
+  - After a listener (re)connect, the broker catches up on ids above the
+    last one it published, since notifications sent while disconnected are
+    lost.
+  - While the listener is down, a single shared poller fetches new rows
+    every FALLBACK_POLL_SEC on behalf of all subscribers.
+
+Subscribers resume from Last-Event-ID by backfilling from the table before
+reading their queue (see admin_events). A subscriber whose queue overflows
+is closed and reconnects through the same backfill path.
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+from starlette.concurrency import run_in_threadpool
+
+from db import get_cursor
+from pg_listener import listener
+
+logger = logging.getLogger("event_broker")
+
+CHANNEL = "sync_task_events"
+FALLBACK_POLL_SEC = 5.0
+QUEUE_SIZE = 1000
+FETCH_LIMIT = 500
+# Ids remembered for de-duplication: a reconnect catch-up can overlap with
+# notifications already delivered, and ids may commit out of order, so
+# "id <= last_id" is not a safe duplicate test.
+RECENT_IDS = 2000
+
+EVENT_COLUMNS = "id, task_id, job_id, event_type, message, payload, created_at"
+
+
+def event_from_row(row) -> dict:
+    event_id, task_id, job_id, event_type, message, payload, created_at = row
+    return {
+        "id": event_id,
+        "task_id": task_id,
+        "job_id": job_id,
+        "type": event_type,
+        "message": message,
+        "payload": payload or {},
+        "created_at": created_at,
+    }
+
+
+def fetch_after(cur, after_id: int, limit: int = FETCH_LIMIT) -> list[dict]:
+    cur.execute(
+        f"""
+        SELECT {EVENT_COLUMNS}
+        FROM sync_task_events
+        WHERE id > %s
+        ORDER BY id ASC
+        LIMIT %s
+        """,
+        (after_id, limit),
+    )
+    return [event_from_row(r) for r in cur.fetchall()]
+
+
+class Subscription:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._poller: asyncio.Task | None = None
+        self._recent: deque[int] = deque()
+        self._recent_set: set[int] = set()
+        self.last_id = 0
+
+    async def start(self) -> None:
+        """Bind to the running event loop (app startup)."""
+        self._loop = asyncio.get_running_loop()
+        with get_cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM sync_task_events")
+            self.last_id = cur.fetchone()[0]
+        self._poller = asyncio.create_task(self._fallback_poll())
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription()
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def _publish(self, events: list[dict]) -> None:
+        """Event-loop side: deliver to every subscriber queue."""
+        for event in events:
+            if event["id"] in self._recent_set:
+                continue
+            self._recent.append(event["id"])
+            self._recent_set.add(event["id"])
+            if len(self._recent) > RECENT_IDS:
+                self._recent_set.discard(self._recent.popleft())
+            self.last_id = max(self.last_id, event["id"])
+            for sub in list(self._subscribers):
+                try:
+                    sub.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    sub.overflowed = True
+                    self._subscribers.discard(sub)
+
+    def _publish_threadsafe(self, events: list[dict]) -> None:
+        if events and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._publish, events)
+
+    # pg_listener callbacks (listener thread)
+
+    def _on_notify(self, conn, payload: str) -> None:
+        try:
+            event_id = int(payload)
+        except ValueError:
+            return
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {EVENT_COLUMNS} FROM sync_task_events WHERE id = %s", (event_id,))
+            row = cur.fetchone()
+        if row:
+            self._publish_threadsafe([event_from_row(row)])
+
+    def _on_connect(self, conn) -> None:
+        if self._loop is None:
+            return
+        # FETCH_LIMIT caps each query, not the catch-up: page through the
+        # whole gap since the last published id.
+        after_id = self.last_id
+        with conn.cursor() as cur:
+            while True:
+                events = fetch_after(cur, after_id)
+                self._publish_threadsafe(events)
+                if len(events) < FETCH_LIMIT:
+                    break
+                after_id = events[-1]["id"]
+
+    async def _fallback_poll(self) -> None:
+        while True:
+            await asyncio.sleep(FALLBACK_POLL_SEC)
+            if listener.connected or not self._subscribers:
+                continue
+            try:
+                events = await run_in_threadpool(self._poll_once, self.last_id)
+                self._publish(events)
+            except Exception as e:
+                logger.warning(f"fallback poll failed: {e}")
+
+    @staticmethod
+    def _poll_once(after_id: int) -> list[dict]:
+        with get_cursor() as cur:
+            return fetch_after(cur, after_id)
+
+
+broker = EventBroker()
+listener.subscribe(CHANNEL, broker._on_notify, on_connect=broker._on_connect)
@@ -0,0 +1,66 @@
+"""Leader election across API processes with a Postgres advisory lock.
+
+The lock is session-level and held on a dedicated connection (outside the
+request pool). If the holder exits or its connection drops, Postgres
+releases the lock and the next try_acquire() in another process wins it.
+TCP keepalives make a silently dead peer's session end in bounded time.
+
+try_acquire() blocks; call it from a thread (run_in_threadpool).
+"""
+
+import logging
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger("leader_lock")
+
+
+class AdvisoryLock:
+    def __init__(self, dsn: str | None, name: str):
+        self.dsn = dsn
+        self.name = name
+        self._conn = None
+        self.is_leader = False
+
+    def _connect(self):
+        conn = psycopg2.connect(
+            self.dsn,
+            keepalives=1,
+            keepalives_idle=10,
+            keepalives_interval=5,
+            keepalives_count=3,
+        )
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def _drop(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self.is_leader = False
+
+    def try_acquire(self) -> bool:
+        """Take the lock if free; as leader, check the session still holds it.
+        Returns whether this process is the leader."""
+        try:
+            if self._conn is None or self._conn.closed:
+                self._drop()
+                self._conn = self._connect()
+            with self._conn.cursor() as cur:
+                if self.is_leader:
+                    cur.execute("SELECT 1")
+                else:
+                    cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (self.name,))
+                    self.is_leader = cur.fetchone()[0]
+        except Exception as e:
+            if self.is_leader:
+                logger.warning(f"lost {self.name} lock connection: {e}")
+            self._drop()
+        return self.is_leader
+
+    def release(self) -> None:
+        self._drop()
@@ -3,8 +3,13 @@ from pathlib import Path
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
+from compression import CompressionMiddleware
 from routers import admin, galleries, proxy, stats
-from proxy_controller import start_worker
+from proxy_controller import close_clients, start_worker
+from pg_listener import listener
+from event_broker import broker
+import maintenance
+import tag_index
 
 THUMB_DIR = Path(os.getenv("THUMB_DIR", "/data/thumbs"))
 
@@ -17,6 +22,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it wraps CORS and sees the final response headers.
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(galleries.router)
 app.include_router(stats.router)
@@ -25,8 +32,17 @@ app.include_router(proxy.router)
 
 
 @app.on_event("startup")
-def _startup():
+async def _startup():
+    await broker.start()
     start_worker()
+    listener.start()
+    maintenance.start()
+    tag_index.warm()
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await close_clients()
 
 
 @app.get("/v1/thumbs/{gid}")
@@ -0,0 +1,68 @@
+"""Periodic database housekeeping run from the API process.
+
+Jobs:
+  - maintain_sync_task_events() (migrations/018) — creates upcoming monthly
+    partitions of sync_task_events, compacts old progress events into
+    sync_task_event_summaries and drops partitions past retention. The
+    function takes an advisory lock, so several API processes running this
+    loop do the work once.
+  - prune_proxy_node_probes() (migrations/020) — drops proxy probe history
+    past PROXY_PROBE_RETENTION.
+"""
+
+import logging
+import threading
+import time
+
+from db import connection_pool
+
+logger = logging.getLogger("maintenance")
+
+MAINTENANCE_INTERVAL_SEC = 3600
+# Delay the first run so startup isn't competing with it.
+INITIAL_DELAY_SEC = 60
+
+
+PROXY_PROBE_RETENTION = "30 days"
+
+
+def _run_scalar(sql: str, params=None):
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            value = cur.fetchone()[0]
+        conn.commit()
+        return value
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
+
+
+def run_task_events_maintenance() -> dict:
+    return _run_scalar("SELECT maintain_sync_task_events()")
+
+
+def run_proxy_probe_pruning() -> int:
+    return _run_scalar("SELECT prune_proxy_node_probes(%s::interval)", (PROXY_PROBE_RETENTION,))
+
+
+def _loop() -> None:
+    time.sleep(INITIAL_DELAY_SEC)
+    while True:
+        try:
+            report = run_task_events_maintenance()
+            logger.info(f"sync_task_events maintenance: {report}")
+        except Exception as e:
+            logger.error(f"sync_task_events maintenance failed: {e}")
+        try:
+            pruned = run_proxy_probe_pruning()
+            if pruned:
+                logger.info(f"pruned {pruned} proxy node probes")
+        except Exception as e:
+            logger.error(f"proxy probe pruning failed: {e}")
+        time.sleep(MAINTENANCE_INTERVAL_SEC)
+
+
+def start() -> None:
+    threading.Thread(target=_loop, name="db-maintenance", daemon=True).start()
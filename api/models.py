@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any, Literal
-from datetime import datetime
+from datetime import date, datetime
 
 VALID_CATEGORIES = [
     "Misc", "Doujinshi", "Manga", "Artist CG", "Game CG",
@@ -47,6 +47,9 @@ class GalleryList(BaseModel):
     page: int
     size: int
     pages: int  # total number of pages
+    # expand=group: members of every version group on the page, keyed by
+    # group_id (capped per group), so opening a group needs no extra request.
+    groups: Optional[Dict[int, List[Gallery]]] = None
 
 
 class GalleryComment(BaseModel):
@@ -65,6 +68,7 @@ class Stats(BaseModel):
     total_galleries: int
     by_category: Dict[str, int]
     last_synced_at: Optional[datetime] = None
+    as_of: Optional[datetime] = None
 
 
 class SyncTaskCreate(BaseModel):
@@ -169,11 +173,23 @@ class SyncTask(BaseModel):
     requested_action: Optional[str] = None
 
 
+class TaskEventSummary(BaseModel):
+    task_id: int
+    event_type: str
+    day: date
+    event_count: int
+    first_at: datetime
+    last_at: datetime
+    last_payload: Dict[str, Any] = {}
+
+
 class ThumbQueueStats(BaseModel):
     pending: int
     processing: int
     done: int
     waiting: int
+    failed: int = 0
+    archived: int = 0
 
 
 class SimilarityDistribution(BaseModel):
@@ -183,6 +199,12 @@ class SimilarityDistribution(BaseModel):
     count_above: int
 
 
+class ThresholdPreview(BaseModel):
+    threshold: float
+    total: int
+    count_above: int
+
+
 class EmbeddingsStatus(BaseModel):
     vocab_size: int
     dim_count: int
@@ -191,3 +213,23 @@ class EmbeddingsStatus(BaseModel):
     pending_count: int
     profile_liked_count: int
     profile_ready: bool
+    as_of: Optional[datetime] = None
+
+
+class RecommendationProfileCreate(BaseModel):
+    name: str
+    categories: List[str] = []
+    tags: List[str] = []  # "ns:value", all must match
+    top_n: int = 2000
+
+
+class RecommendationProfile(BaseModel):
+    id: int
+    name: str
+    categories: List[str]
+    tags: List[str]
+    top_n: int
+    liked_count: int
+    scored_count: int
+    built_at: Optional[datetime] = None
+    created_at: datetime
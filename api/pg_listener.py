@@ -0,0 +1,104 @@
+"""Postgres LISTEN/NOTIFY dispatcher for in-process caches.
+
+One daemon thread per API process holds a dedicated autocommit connection
+(outside the request pool), LISTENs on every subscribed channel and calls
+the channel's handlers with (conn, payload) as notifications arrive.
+Handlers run on the listener thread and may query through the connection
+they are given.
+
+Notifications sent while the connection is down are lost, so after every
+(re)connect the `on_connect` hooks run; caches use them to reload in full.
+`connected` tells callers whether cached state can currently be trusted.
+"""
+
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+from typing import Callable
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger("pg_listener")
+
+POLL_TIMEOUT_SEC = 5.0
+RECONNECT_MIN_SEC = 1.0
+RECONNECT_MAX_SEC = 30.0
+
+
+class PgListener:
+    def __init__(self, dsn: str | None):
+        self.dsn = dsn
+        self._handlers: dict[str, list[Callable]] = defaultdict(list)
+        self._on_connect: list[Callable] = []
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.connected = False
+
+    def subscribe(self, channel: str, handler: Callable, on_connect: Callable | None = None) -> None:
+        """Register handler(conn, payload) for `channel` and an optional
+        on_connect(conn) hook. Subscribe before start()."""
+        with self._lock:
+            self._handlers[channel].append(handler)
+            if on_connect is not None:
+                self._on_connect.append(on_connect)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None or not self._handlers:
+                return
+            self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            for channel in self._handlers:
+                cur.execute(f'LISTEN "{channel}"')
+        for hook in self._on_connect:
+            hook(conn)
+        return conn
+
+    def _dispatch(self, conn) -> None:
+        conn.poll()
+        while conn.notifies:
+            note = conn.notifies.pop(0)
+            for handler in self._handlers.get(note.channel, ()):
+                try:
+                    handler(conn, note.payload)
+                except Exception as e:
+                    logger.error(f"handler for {note.channel} failed: {e}")
+
+    def _run(self) -> None:
+        backoff = RECONNECT_MIN_SEC
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                self.connected = True
+                backoff = RECONNECT_MIN_SEC
+                logger.info(f"listening on {', '.join(self._handlers)}")
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], POLL_TIMEOUT_SEC) != ([], [], []):
+                        self._dispatch(conn)
+            except Exception as e:
+                logger.warning(f"listener connection lost: {e}; retrying in {backoff:.0f}s")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_SEC)
+
+
+listener = PgListener(os.getenv("DATABASE_URL"))
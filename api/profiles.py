@@ -0,0 +1,198 @@
+"""Named recommendation profiles (migrations/012_named_profiles.sql).
+
+A profile is built from the favorites matching its category list and tag
+filter with the same weighting as RebuildUserProfile:
+
+    profile[X] = idf(X) * type_weight(X) * (1 + ln(tf_subset(X)))
+
+L2-normalized. Every listed gallery is then scored with the similarity
+engine's sparse mat-vec and only the top_n scores are kept in
+profile_similarity, swapped in one transaction so readers never see a
+half-written ranking.
+
+Named profiles are not rebuilt automatically when favorites change; rebuild
+them from the admin API or run this module from cron.
+
+CLI:    python profiles.py [--dsn postgresql://...] [--name NAME]
+Admin:  POST /v1/admin/profiles/{id}/rebuild, POST /v1/admin/profiles/rebuild
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+import similarity_engine
+
+# Favorites selected by a profile's categories + tag_filter.
+SUBSET_SQL = """
+    SELECT g.tags
+    FROM user_favorites f
+    JOIN eh_galleries g ON g.gid = f.gid
+    JOIN recommendation_profiles p ON p.id = %(id)s
+    WHERE g.is_active = TRUE
+      AND (cardinality(p.categories) = 0 OR g.category = ANY(p.categories))
+      AND g.tags @> p.tag_filter
+"""
+
+PROFILE_TF_SQL = f"""
+    WITH tf AS (
+        SELECT t.ns, tag_value AS tag, COUNT(*)::INT AS cnt
+        FROM ({SUBSET_SQL}) s,
+             jsonb_each(s.tags) AS t(ns, vals),
+             jsonb_array_elements_text(vals) AS tag_value
+        GROUP BY t.ns, tag_value
+    )
+    SELECT v.dim, v.idf * v.type_weight * (1.0 + LN(tf.cnt::float))
+    FROM tf
+    JOIN tag_vocabulary v
+      ON v.namespace = tf.ns AND v.tag = tf.tag AND v.is_active = TRUE
+"""
+
+
+class ProfileNotFound(LookupError):
+    pass
+
+
+def tag_filter_from(tags: list[str]) -> dict[str, list[str]]:
+    """["ns:value", ...] -> {"ns": ["value", ...]} for the tags @> filter."""
+    out: dict[str, list[str]] = {}
+    for t in tags:
+        ns, sep, val = t.replace("\uff1a", ":").partition(":")
+        ns, val = ns.strip().lower(), val.strip()
+        if not sep or not ns or not val:
+            raise ValueError(f"tag must be ns:value, got {t!r}")
+        if val not in out.setdefault(ns, []):
+            out[ns].append(val)
+    return out
+
+
+def tags_of(tag_filter: dict[str, list[str]]) -> list[str]:
+    return [f"{ns}:{val}" for ns, vals in tag_filter.items() for val in vals]
+
+
+def build_vector(cur, profile_id: int) -> tuple[np.ndarray | None, int]:
+    """Normalized dense profile vector (None when the subset has no active
+    tags) and the number of favorites in the subset."""
+    cur.execute(f"SELECT COUNT(*) FROM ({SUBSET_SQL}) s", {"id": profile_id})
+    liked = cur.fetchone()[0]
+    cur.execute(PROFILE_TF_SQL, {"id": profile_id})
+    vector = np.zeros(similarity_engine.EMBEDDING_DIM, dtype=np.float64)
+    for dim, val in cur.fetchall():
+        vector[dim] = val
+    norm = np.linalg.norm(vector)
+    if not norm:
+        return None, liked
+    return vector / norm, liked
+
+
+def top_scores(gids: np.ndarray, scores: np.ndarray, top_n: int) -> tuple[np.ndarray, np.ndarray]:
+    """The top_n (gid, score) pairs, best first; NaN scores are skipped."""
+    valid = np.flatnonzero(~np.isnan(scores))
+    if len(valid) > top_n:
+        valid = valid[np.argpartition(scores[valid], -top_n)[-top_n:]]
+    order = valid[np.lexsort((-gids[valid], -scores[valid]))]
+    return gids[order], scores[order]
+
+
+def _write_ranking(cur, profile_id: int, gids: np.ndarray, scores: np.ndarray) -> None:
+    cur.execute("DELETE FROM profile_similarity WHERE profile_id = %s", (profile_id,))
+    if not len(gids):
+        return
+    buf = io.StringIO()
+    for gid, score in zip(gids, scores):
+        buf.write(f"{profile_id}\t{gid}\t{float(score)!r}\n")
+    buf.seek(0)
+    cur.copy_expert("COPY profile_similarity (profile_id, gid, similarity) FROM STDIN", buf)
+
+
+def rebuild_profiles(conn, profile_ids: list[int] | None = None) -> list[dict]:
+    """Rebuild the given profiles (all when None). Embeddings are loaded once
+    and shared. Each profile is committed on its own."""
+    with conn.cursor() as cur:
+        if profile_ids is None:
+            cur.execute("SELECT id, name, top_n FROM recommendation_profiles ORDER BY id")
+        else:
+            cur.execute(
+                "SELECT id, name, top_n FROM recommendation_profiles WHERE id = ANY(%s) ORDER BY id",
+                (profile_ids,),
+            )
+        profiles = cur.fetchall()
+    if profile_ids is not None and len(profiles) < len(set(profile_ids)):
+        raise ProfileNotFound("recommendation profile not found")
+    if not profiles:
+        return []
+
+    t0 = time.perf_counter()
+    gids, matrix, _ = similarity_engine.load_embeddings(conn, listed_only=True)
+    conn.commit()
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    reports = []
+    for profile_id, name, top_n in profiles:
+        t0 = time.perf_counter()
+        with conn.cursor() as cur:
+            vector, liked = build_vector(cur, profile_id)
+            scores = similarity_engine.cosine_scores(matrix, vector)
+            top_gids, top_vals = top_scores(gids, scores, top_n)
+            _write_ranking(cur, profile_id, top_gids, top_vals)
+            cur.execute(
+                """
+                UPDATE recommendation_profiles
+                SET embedding = %s::sparsevec, liked_count = %s, scored_count = %s, built_at = NOW()
+                WHERE id = %s
+                """,
+                (
+                    None if vector is None else similarity_engine.format_sparsevec(vector),
+                    liked, len(top_gids), profile_id,
+                ),
+            )
+        conn.commit()
+        reports.append({
+            "id": profile_id,
+            "name": name,
+            "liked_count": liked,
+            "scored_count": int(len(top_gids)),
+            "build_ms": round((time.perf_counter() - t0) * 1000, 1),
+        })
+
+    for report in reports:
+        report["load_ms"] = round(load_ms, 1)
+    return reports
+
+
+def main() -> int:
+    import psycopg2
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--dsn", default=os.getenv("DATABASE_URL"))
+    ap.add_argument("--name", help="rebuild only this profile")
+    args = ap.parse_args()
+    if not args.dsn:
+        ap.error("--dsn or DATABASE_URL is required")
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        ids = None
+        if args.name:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id FROM recommendation_profiles WHERE name = %s", (args.name,))
+                row = cur.fetchone()
+            if not row:
+                print(f"no profile named {args.name!r}")
+                return 1
+            ids = [row[0]]
+        reports = rebuild_profiles(conn, ids)
+    finally:
+        conn.close()
+
+    for r in reports:
+        print(f"{r['name']:20s} liked={r['liked_count']:5d} scored={r['scored_count']:6d} {r['build_ms']:8.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,25 +2,69 @@
 
 Architecture:
   - Scraper writes `proxy.banned` events to sync_task_events on ban detection.
-  - This controller polls sync_task_events every few seconds for new ban events.
+  - An insert trigger (migrations/019) sends NOTIFY proxy_banned; the
+    pg_listener thread hands it to the worker, which reacts immediately.
+    sync_task_events is polled every few seconds only while the listener
+    is disconnected, and once on every (re)connect to catch up.
   - On a new ban event, it scans mihomo candidate nodes (SELECT group),
     probing each with a cookie-authenticated request to exhentai.
   - If a healthy node is found, it switches mihomo's SELECT to that node.
+
+Probe modes (PROXY_PROBE_MODE):
+  - "serial" (default): switch SELECT to each node in turn and probe
+    through PROXY_URL until one is healthy.
+  - "parallel": probe all nodes concurrently (at most
+    PROXY_PROBE_CONCURRENCY at once) without touching SELECT. Nodes with a
+    dedicated mihomo listener (PROXY_NODE_LISTENERS="NODE=http://host:port,...")
+    get the full cookie/ban-page check through that listener; the rest get
+    mihomo's delay API as a reachability check. SELECT is switched once,
+    to the healthiest, then fastest, verified node. Only when no listener
+    node is healthy are the remaining nodes switch-probed like a serial
+    scan: reachable-but-unverified ones first (in health then delay
+    order), then those whose delay test failed, since mihomo's delay URL
+    can fail on a node that still serves the site.
+  - Every probe is recorded in proxy_node_probes (migrations/020). Each
+    node gets a health score, a success rate with exponential recency decay
+    (HEALTH_HALF_LIFE_SEC), and decayed mean latencies kept apart per kind:
+    page fetches (listener/switch probes) and mihomo delay tests measure
+    different things. Scans probe nodes in order of score, then latency.
+  - Warm standby (PROXY_STANDBY_NODES > 0): a background prober cycles
+    through the best-ranked non-current nodes, spending at most
+    PROXY_STANDBY_BUDGET probe requests per hour, without touching SELECT.
+    On a ban the controller switches straight to the freshest verified
+    standby and confirms it through PROXY_URL. It falls back to a full
+    scan if that check fails.
   - If all nodes are banned, it logs and waits (cooldown to avoid storm).
   - Scraper's exponential backoff will detect the recovery on its next probe.
 
-The controller is a singleton started once at app startup via start_worker().
+Leader election: start_worker() runs in every API worker process, but only
+the one holding the proxy_controller advisory lock (api/leader_lock.py) runs
+the ban watcher and standby prober. The leader mirrors its ProxyState
+snapshot into proxy_controller_state (migrations/021). Other workers serve
+/v1/admin/proxy/status from that row and forward scan and switch requests
+with NOTIFY proxy_controller_command. When the leader dies, its session's
+lock is released and another worker takes over within LEADER_CHECK_SEC,
+resuming from the shared row.
 """
 
 import asyncio
+import importlib.util
+import json
 import os
+import socket
 import time
 import logging
 import httpx
 import psycopg2
+from psycopg2.extras import Json
 from typing import Optional
+from urllib.parse import quote
+
+from starlette.concurrency import run_in_threadpool
 
 from db import connection_pool
+from leader_lock import AdvisoryLock
+from pg_listener import listener
 
 logger = logging.getLogger("proxy_controller")
 
@@ -33,15 +77,73 @@ EX_BASE_URL = os.getenv("EX_BASE_URL", "https://exhentai.org")
 # every ~30s while banned). Once we scan, we don't scan again for this long.
 SCAN_COOLDOWN_SEC = 300  # 5 minutes
 
-# Poll interval for checking new ban events in sync_task_events.
+# Fallback poll interval for new ban events while the listener is down.
 POLL_INTERVAL_SEC = 5
 
+BAN_CHANNEL = "proxy_banned"
+
 # Per-node probe timeout.
 PROBE_TIMEOUT_SEC = 12
 
 # SELECT group name in mihomo (the top-level selector).
 SELECT_GROUP = "SELECT"
 
+PROBE_MODE = os.getenv("PROXY_PROBE_MODE", "serial")
+PROBE_CONCURRENCY = int(os.getenv("PROXY_PROBE_CONCURRENCY", "4"))
+
+# Timeout for mihomo's /proxies/{name}/delay reachability test.
+DELAY_TIMEOUT_MS = 5000
+
+# How long a fetched /proxies topology (group types + membership) is reused.
+TOPOLOGY_TTL_SEC = 60
+
+# Health scoring from proxy_node_probes: a probe's weight halves every
+# HEALTH_HALF_LIFE_SEC; probes older than HEALTH_WINDOW are ignored. The
+# prior pulls nodes with little history towards a neutral score.
+HEALTH_HALF_LIFE_SEC = int(os.getenv("PROXY_HEALTH_HALF_LIFE_SEC", str(6 * 3600)))
+HEALTH_WINDOW = "7 days"
+HEALTH_PRIOR_SCORE = 0.5
+HEALTH_PRIOR_WEIGHT = 1.0
+# Credit per probe outcome; "reachable" (delay test only) can't rule out a ban.
+PROBE_CREDIT = {"ok": 1.0, "reachable": 0.5}
+
+# Warm-standby prober: how many nodes to keep probed and how many probe
+# requests per hour it may spend on them. A standby result older than
+# STANDBY_MAX_AGE_SEC is not trusted for an instant switch.
+STANDBY_NODES = int(os.getenv("PROXY_STANDBY_NODES", "0"))
+STANDBY_BUDGET_PER_HOUR = int(os.getenv("PROXY_STANDBY_BUDGET", "12"))
+STANDBY_MAX_AGE_SEC = 1800
+
+# Long-lived HTTP clients (see HttpClients). HTTP/2 needs the h2 package
+# (httpx[http2]); without it the listener clients fall back to HTTP/1.1.
+HTTP2 = importlib.util.find_spec("h2") is not None
+LISTENER_KEEPALIVE_SEC = 60
+
+# Leader election between API worker processes. The leader re-checks its
+# lock every LEADER_CHECK_SEC and rewrites proxy_controller_state when the
+# snapshot changes, or at least every STATE_HEARTBEAT_SEC. A shared row
+# older than LEADER_STALE_SEC means no live leader is there to take
+# forwarded commands.
+LEADER_CHECK_SEC = 5
+STATE_HEARTBEAT_SEC = 30
+LEADER_STALE_SEC = STATE_HEARTBEAT_SEC + 3 * LEADER_CHECK_SEC
+COMMAND_CHANNEL = "proxy_controller_command"
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _parse_listeners(raw: str) -> dict[str, str]:
+    """"NODE=http://host:port,NODE2=..." -> {node: proxy_url}."""
+    listeners = {}
+    for item in raw.split(","):
+        name, _, url = item.partition("=")
+        name, url = name.strip(), url.strip()
+        if name and url:
+            listeners[name] = url
+    return listeners
+
+
+NODE_LISTENERS = _parse_listeners(os.getenv("PROXY_NODE_LISTENERS", ""))
+
 
 class ProxyState:
     """In-memory state of the proxy controller, shared with the router."""
@@ -52,9 +154,13 @@ class ProxyState:
         self.last_scan_result: Optional[str] = None  # "switched" | "all_banned" | "error"
         self.last_switched_to: Optional[str] = None
         self.last_ban_event_at: Optional[float] = None
+        self.last_ban_event_id: Optional[int] = None
         self.last_ban_duration: Optional[int] = None
         self.scan_in_progress: bool = False
         self.scan_history: list[dict] = []  # recent scan results, newest first
+        self.topology: Optional[dict] = None  # see _mihomo_get_topology
+        self.node_health: dict[str, dict] = {}  # see _load_node_health
+        self.standby: dict[str, dict] = {}  # node -> latest standby probe result
 
     def snapshot(self) -> dict:
         return {
@@ -63,16 +169,94 @@ class ProxyState:
             "last_scan_result": self.last_scan_result,
             "last_switched_to": self.last_switched_to,
             "last_ban_event_at": self.last_ban_event_at,
+            "last_ban_event_id": self.last_ban_event_id,
             "last_ban_duration": self.last_ban_duration,
             "scan_in_progress": self.scan_in_progress,
             "scan_history": self.scan_history[:10],
             "mihomo_api": MIHOMO_API or None,
             "proxy_url": PROXY_URL or None,
+            "probe_mode": PROBE_MODE,
+            "node_listeners": sorted(NODE_LISTENERS),
+            "topology": self.topology,
+            "node_health": self.node_health,
+            "standby": {
+                "nodes": STANDBY_NODES,
+                "budget_per_hour": STANDBY_BUDGET_PER_HOUR,
+                "results": self.standby,
+            },
+        }
+
+    # Fields a newly elected leader takes over from the shared snapshot.
+    RESUMED_FIELDS = (
+        "last_scan_at", "last_scan_result", "last_switched_to",
+        "last_ban_event_at", "last_ban_event_id", "last_ban_duration",
+        "scan_history",
+    )
+
+    def resume(self, snapshot: dict) -> None:
+        for field in self.RESUMED_FIELDS:
+            if snapshot.get(field) is not None:
+                setattr(self, field, snapshot[field])
+
+
+class HttpClients:
+    """HTTP clients reused across scans, probes and admin requests.
+
+      mihomo     mihomo's REST API (keep-alive, no proxy)
+      select     EX_BASE_URL through PROXY_URL, i.e. whatever SELECT points
+                 at. No keep-alive: mihomo routes a connection when it is
+                 opened, so a pooled connection would keep probing the node
+                 that was selected before the last switch.
+      listeners  one per PROXY_NODE_LISTENERS entry, HTTP/2 keep-alive; a
+                 listener always routes through the same node, so reuse is
+                 safe.
+
+    Opened by start_worker() and closed at app shutdown (close_clients).
+    """
+
+    def __init__(self):
+        self.mihomo: Optional[httpx.AsyncClient] = None
+        self.select: Optional[httpx.AsyncClient] = None
+        self.listeners: dict[str, httpx.AsyncClient] = {}
+
+    def open(self) -> None:
+        if self.mihomo is not None:
+            return
+        self.mihomo = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=PROBE_CONCURRENCY + 4, max_keepalive_connections=4),
+        )
+        if PROXY_URL:
+            self.select = httpx.AsyncClient(
+                proxy=PROXY_URL,
+                headers={"Connection": "close"},
+                limits=httpx.Limits(max_connections=2, max_keepalive_connections=0),
+            )
+        self.listeners = {
+            node: httpx.AsyncClient(
+                proxy=url,
+                http2=HTTP2,
+                limits=httpx.Limits(
+                    max_connections=2,
+                    max_keepalive_connections=1,
+                    keepalive_expiry=LISTENER_KEEPALIVE_SEC,
+                ),
+            )
+            for node, url in NODE_LISTENERS.items()
         }
 
+    async def aclose(self) -> None:
+        for client in (self.mihomo, self.select, *self.listeners.values()):
+            if client is not None:
+                await client.aclose()
+        self.mihomo = None
+        self.select = None
+        self.listeners = {}
+
 
 # Global singleton state
 state = ProxyState()
+clients = HttpClients()
+leader = AdvisoryLock(os.getenv("DATABASE_URL"), "proxy_controller")
 
 
 def _parse_cookies(raw: str) -> dict:
@@ -89,43 +273,72 @@ def _parse_cookies(raw: str) -> dict:
     return cookies
 
 
-async def _mihomo_get_select_nodes(client: httpx.AsyncClient) -> list[str]:
-    """Get the list of selectable items in the SELECT group."""
-    resp = await client.get(f"{MIHOMO_API}/proxies/{SELECT_GROUP}", timeout=5)
-    resp.raise_for_status()
-    data = resp.json()
-    return data.get("all", [])
+async def _mihomo_get_topology(client: httpx.AsyncClient, max_age: float = TOPOLOGY_TTL_SEC) -> dict:
+    """Group layout from a single GET /proxies, cached for `max_age` seconds.
 
+    {
+      "fetched_at": epoch seconds,
+      "select_now": node currently selected in SELECT,
+      "candidates": SELECT children that are URLTest groups, in SELECT order
+                    (Selector groups like NON-JP and DIRECT are skipped),
+      "groups":     {name: {"type", "now", "members"}} for every group,
+      "proxy_count": number of leaf proxies,
+    }
+    """
+    topo = state.topology
+    if topo is not None and time.time() - topo["fetched_at"] < max_age:
+        return topo
 
-async def _mihomo_get_proxy_type(client: httpx.AsyncClient, name: str) -> str:
-    """Get the type of a proxy entry (Selector, URLTest, Shadowsocks, etc.)."""
-    from urllib.parse import quote
-    resp = await client.get(f"{MIHOMO_API}/proxies/{quote(name)}", timeout=5)
+    resp = await client.get(f"{MIHOMO_API}/proxies", timeout=5)
     resp.raise_for_status()
-    return resp.json().get("type", "")
+    proxies = resp.json().get("proxies", {})
 
+    select = proxies.get(SELECT_GROUP, {})
+    groups = {
+        name: {"type": p.get("type"), "now": p.get("now"), "members": p.get("all", [])}
+        for name, p in proxies.items()
+        if "all" in p
+    }
+    topo = {
+        "fetched_at": time.time(),
+        "select_now": select.get("now"),
+        "candidates": [
+            name for name in select.get("all", [])
+            if name != "DIRECT" and proxies.get(name, {}).get("type") == "URLTest"
+        ],
+        "groups": groups,
+        "proxy_count": len(proxies) - len(groups),
+    }
+    state.topology = topo
+    return topo
 
-async def _mihomo_get_urltest_groups(client: httpx.AsyncClient) -> list[str]:
-    """Get SELECT children that are URLTest groups (skip Selector groups like NON-JP and DIRECT)."""
-    all_nodes = await _mihomo_get_select_nodes(client)
-    groups = []
-    for name in all_nodes:
-        if name == "DIRECT":
-            continue
-        ptype = await _mihomo_get_proxy_type(client, name)
-        if ptype == "URLTest":
-            groups.append(name)
-    return groups
+
+class NotLeaderError(RuntimeError):
+    """Raised instead of touching SELECT after this process lost leadership."""
 
 
 async def _mihomo_switch(client: httpx.AsyncClient, node: str) -> None:
-    """Switch the SELECT group to the given node."""
-    resp = await client.put(
-        f"{MIHOMO_API}/proxies/{SELECT_GROUP}",
-        json={"name": node},
-        timeout=5,
-    )
-    resp.raise_for_status()
+    """Switch the SELECT group to the given node (leader only)."""
+    # Leadership can be lost mid-scan; a former leader must not keep
+    # switching SELECT under the new one.
+    if not leader.is_leader:
+        raise NotLeaderError(f"not the proxy controller leader, not switching to {node}")
+    try:
+        resp = await client.put(
+            f"{MIHOMO_API}/proxies/{SELECT_GROUP}",
+            json={"name": node},
+            timeout=5,
+        )
+        resp.raise_for_status()
+    except Exception:
+        # The PUT may or may not have landed; refetch on next use.
+        state.topology = None
+        raise
+    topo = state.topology
+    if topo is not None:
+        topo["select_now"] = node
+        if SELECT_GROUP in topo["groups"]:
+            topo["groups"][SELECT_GROUP]["now"] = node
 
 
 async def _mihomo_get_current(client: httpx.AsyncClient) -> Optional[str]:
@@ -135,28 +348,16 @@ async def _mihomo_get_current(client: httpx.AsyncClient) -> Optional[str]:
     return resp.json().get("now")
 
 
-async def _probe_node(client: httpx.AsyncClient, node: str, cookies: dict) -> str:
-    """Probe exhentai through a specific mihomo node.
+async def switch_node(node: str) -> dict:
+    """Manual switch of the SELECT group to `node` (leader only)."""
+    await _mihomo_switch(clients.mihomo, node)
+    state.current_node = await _mihomo_get_current(clients.mihomo)
+    state.last_switched_to = node
+    state.last_scan_result = "manual_switch"
+    return {"switched_to": node, "current_node": state.current_node}
 
-    Returns:
-      "ok"       — site responds normally (200 + content)
-      "banned"   — ban page detected
-      "error"    — inconclusive (timeout, connection error, etc.)
-    """
-    await _mihomo_switch(client, node)
-    await asyncio.sleep(0.5)  # let mihomo pick up the switch
-
-    try:
-        resp = await client.get(
-            EX_BASE_URL,
-            cookies=cookies,
-            timeout=PROBE_TIMEOUT_SEC,
-            follow_redirects=False,
-        )
-    except (httpx.TimeoutException, httpx.ConnectError, httpx.HTTPError) as e:
-        logger.warning(f"probe {node}: error {e}")
-        return "error"
 
+def _classify_probe(node: str, resp: httpx.Response) -> str:
     if resp.status_code != 200:
         logger.warning(f"probe {node}: HTTP {resp.status_code}")
         return "error"
@@ -174,6 +375,299 @@ async def _probe_node(client: httpx.AsyncClient, node: str, cookies: dict) -> st
     return "error"
 
 
+async def _probe_through(client: httpx.AsyncClient, node: str, cookies: dict) -> str:
+    """Fetch EX_BASE_URL through `client` and classify the response."""
+    try:
+        resp = await client.get(
+            EX_BASE_URL,
+            cookies=cookies,
+            timeout=PROBE_TIMEOUT_SEC,
+            follow_redirects=False,
+        )
+    except (httpx.TimeoutException, httpx.ConnectError, httpx.HTTPError) as e:
+        logger.warning(f"probe {node}: error {e}")
+        return "error"
+    return _classify_probe(node, resp)
+
+
+async def _probe_node(mihomo_client: httpx.AsyncClient, proxy_client: httpx.AsyncClient,
+                      node: str, cookies: dict, via: str = "switch") -> dict:
+    """Probe exhentai through a specific mihomo node.
+
+    Switches SELECT to `node`, then probes through `proxy_client`, which
+    must open a fresh connection (see HttpClients.select). latency_ms
+    covers the page fetch only, like _probe_listener, not the switch.
+
+    Status:
+      "ok"       — site responds normally (200 + content)
+      "banned"   — ban page detected
+      "error"    — inconclusive (timeout, connection error, etc.)
+    """
+    await _mihomo_switch(mihomo_client, node)
+    await asyncio.sleep(0.5)  # let mihomo pick up the switch
+    t0 = time.perf_counter()
+    status = await _probe_through(proxy_client, node, cookies)
+    return {
+        "node": node,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - t0) * 1000),
+        "via": via,
+    }
+
+
+async def _probe_listener(node: str, cookies: dict) -> dict:
+    """Full probe through the node's dedicated listener; SELECT untouched."""
+    t0 = time.perf_counter()
+    status = await _probe_through(clients.listeners[node], node, cookies)
+    return {
+        "node": node,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - t0) * 1000),
+        "via": "listener",
+    }
+
+
+async def _probe_delay(client: httpx.AsyncClient, node: str) -> dict:
+    """mihomo delay test: reachability + latency only (no cookies, so a ban
+    page can't be detected). Status "reachable" or "error"."""
+    try:
+        resp = await client.get(
+            f"{MIHOMO_API}/proxies/{quote(node)}/delay",
+            params={"url": EX_BASE_URL, "timeout": DELAY_TIMEOUT_MS},
+            timeout=DELAY_TIMEOUT_MS / 1000 + 2,
+        )
+        delay = resp.json().get("delay") if resp.status_code == 200 else None
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f"delay {node}: error {e}")
+        delay = None
+    return {
+        "node": node,
+        "status": "reachable" if delay else "error",
+        "latency_ms": delay,
+        "via": "delay",
+    }
+
+
+# Latency is averaged per kind: page fetches through the node (listener,
+# switch, standby) and mihomo delay tests (via = 'delay') are not comparable.
+NODE_HEALTH_SQL = """
+    SELECT node,
+           SUM(w * CASE status WHEN 'ok' THEN %(ok)s WHEN 'reachable' THEN %(reachable)s ELSE 0 END),
+           SUM(w),
+           SUM(w * latency_ms) FILTER (WHERE status = 'ok' AND via <> 'delay' AND latency_ms IS NOT NULL)
+             / NULLIF(SUM(w) FILTER (WHERE status = 'ok' AND via <> 'delay' AND latency_ms IS NOT NULL), 0),
+           SUM(w * latency_ms) FILTER (WHERE status = 'reachable' AND via = 'delay' AND latency_ms IS NOT NULL)
+             / NULLIF(SUM(w) FILTER (WHERE status = 'reachable' AND via = 'delay' AND latency_ms IS NOT NULL), 0),
+           COUNT(*),
+           MAX(probed_at),
+           (array_agg(status ORDER BY probed_at DESC))[1]
+    FROM (
+        SELECT node, status, latency_ms, via, probed_at,
+               exp(-ln(2) * extract(epoch FROM NOW() - probed_at) / %(half_life)s) AS w
+        FROM proxy_node_probes
+        WHERE probed_at > NOW() - %(window)s::interval
+    ) p
+    GROUP BY node
+"""
+
+
+def _load_node_health() -> dict[str, dict]:
+    """Per-node health from proxy_node_probes:
+
+    {node: {"score": 0..1, "latency_ms", "delay_ms", "probes", "last_status", "last_probe_at"}}
+
+    latency_ms is the mean page-fetch time of successful probes, delay_ms
+    the mean mihomo delay-test result.
+    """
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(NODE_HEALTH_SQL, {
+                "ok": PROBE_CREDIT["ok"],
+                "reachable": PROBE_CREDIT["reachable"],
+                "half_life": HEALTH_HALF_LIFE_SEC,
+                "window": HEALTH_WINDOW,
+            })
+            rows = cur.fetchall()
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
+
+    health = {}
+    for node, credit, weight, latency, delay, probes, last_at, last_status in rows:
+        score = (float(credit) + HEALTH_PRIOR_SCORE * HEALTH_PRIOR_WEIGHT) / (float(weight) + HEALTH_PRIOR_WEIGHT)
+        health[node] = {
+            "score": round(score, 4),
+            "latency_ms": round(float(latency)) if latency is not None else None,
+            "delay_ms": round(float(delay)) if delay is not None else None,
+            "probes": probes,
+            "last_status": last_status,
+            "last_probe_at": last_at.timestamp(),
+        }
+    return health
+
+
+def _record_probes(results: list[dict]) -> dict[str, dict]:
+    """Append scan results to proxy_node_probes and return refreshed health."""
+    rows = [
+        (r["node"], r["status"], r.get("latency_ms"), r.get("via"))
+        for r in results
+        if r.get("node") and r.get("status")
+    ]
+    if rows:
+        conn = connection_pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    "INSERT INTO proxy_node_probes (node, status, latency_ms, via) VALUES (%s, %s, %s, %s)",
+                    rows,
+                )
+            conn.commit()
+        finally:
+            conn.rollback()
+            connection_pool.putconn(conn)
+    return _load_node_health()
+
+
+def _health_score(node: str) -> float:
+    h = state.node_health.get(node)
+    return h["score"] if h else HEALTH_PRIOR_SCORE
+
+
+def _rank_nodes(nodes: list[str]) -> list[str]:
+    """Highest health score first, then lowest page-fetch latency, then
+    lowest delay-test latency (the two are never compared with each other);
+    mihomo's order breaks ties."""
+    inf = float("inf")
+
+    def key(item):
+        i, node = item
+        h = state.node_health.get(node) or {}
+        latency, delay = h.get("latency_ms"), h.get("delay_ms")
+        return (
+            -_health_score(node),
+            latency if latency is not None else inf,
+            delay if delay is not None else inf,
+            i,
+        )
+    return [node for _, node in sorted(enumerate(nodes), key=key)]
+
+
+async def _update_node_health(results: list[dict]) -> None:
+    try:
+        state.node_health = await run_in_threadpool(_record_probes, results)
+    except Exception as e:
+        logger.warning(f"failed to record probe results: {e}")
+
+
+async def _scan_serial(mihomo_client, proxy_client, nodes, cookies) -> tuple[list[dict], Optional[str]]:
+    results = []
+    for node in nodes:
+        result = await _probe_node(mihomo_client, proxy_client, node, cookies)
+        results.append(result)
+        if result["status"] == "ok":
+            return results, node
+    return results, None
+
+
+async def _scan_parallel(mihomo_client, proxy_client, nodes, cookies) -> tuple[list[dict], Optional[str]]:
+    sem = asyncio.Semaphore(max(1, PROBE_CONCURRENCY))
+
+    async def probe(node: str) -> dict:
+        async with sem:
+            if node in NODE_LISTENERS:
+                return await _probe_listener(node, cookies)
+            return await _probe_delay(mihomo_client, node)
+
+    results = list(await asyncio.gather(*(probe(n) for n in nodes)))
+
+    def by_latency(r: dict) -> float:
+        return r["latency_ms"] if r["latency_ms"] is not None else float("inf")
+
+    healthy = sorted(
+        (r for r in results if r["status"] == "ok"),
+        key=lambda r: (-_health_score(r["node"]), by_latency(r)),
+    )
+    if healthy:
+        best = healthy[0]["node"]
+        await _mihomo_switch(mihomo_client, best)
+        return results, best
+
+    # No listener-verified node: confirm the rest through SELECT, reachable
+    # ones healthiest then fastest first, then delay-failed ones in ranked
+    # order. Listener nodes already had the full check. Every probe here
+    # switches SELECT, so stop at the first healthy node.
+    reachable = [r for r in results if r["status"] == "reachable"]
+    reachable.sort(key=lambda r: (-_health_score(r["node"]), by_latency(r)))
+    failed = [r for r in results if r["via"] == "delay" and r["status"] == "error"]
+    for r in reachable + failed:
+        r.update(await _probe_node(mihomo_client, proxy_client, r["node"], cookies))
+        if r["status"] == "ok":
+            return results, r["node"]
+    return results, None
+
+
+def _standby_candidate() -> Optional[str]:
+    """Freshest-verified standby node other than the current one: listener
+    "ok" results before delay-only "reachable" ones, then lower latency."""
+    now = time.time()
+    fresh = [
+        (node, r) for node, r in state.standby.items()
+        if node != state.current_node
+        and r["status"] in ("ok", "reachable")
+        and now - r["probed_at"] < STANDBY_MAX_AGE_SEC
+    ]
+    if not fresh:
+        return None
+    fresh.sort(key=lambda item: (item[1]["status"] != "ok", item[1]["latency_ms"] or float("inf")))
+    return fresh[0][0]
+
+
+async def _try_standby(mihomo_client, proxy_client, cookies) -> tuple[list[dict], Optional[str]]:
+    """Switch to the best standby node and verify it through PROXY_URL."""
+    node = _standby_candidate()
+    if node is None:
+        return [], None
+    result = await _probe_node(mihomo_client, proxy_client, node, cookies, via="standby")
+    logger.info(f"standby switch to {node}: {result['status']}")
+    if result["status"] != "ok":
+        state.standby.pop(node, None)
+        return [result], None
+    return [result], node
+
+
+async def _standby_loop():
+    """Probe one standby node every 3600 / STANDBY_BUDGET_PER_HOUR seconds,
+    round-robin over the STANDBY_NODES best-ranked non-current nodes."""
+    interval = 3600 / max(1, STANDBY_BUDGET_PER_HOUR)
+    logger.info(f"standby prober started: {STANDBY_NODES} nodes, one probe every {interval:.0f}s")
+    cookies = _parse_cookies(EX_COOKIES)
+    turn = 0
+    while True:
+        await asyncio.sleep(interval)
+        if state.scan_in_progress:
+            continue
+        try:
+            topo = await _mihomo_get_topology(clients.mihomo)
+            ranked = [n for n in _rank_nodes(topo["candidates"]) if n != topo["select_now"]]
+            standby = ranked[:STANDBY_NODES]
+            for node in list(state.standby):
+                if node not in standby:
+                    del state.standby[node]
+            if not standby:
+                continue
+            node = standby[turn % len(standby)]
+            turn += 1
+            if node in NODE_LISTENERS:
+                result = await _probe_listener(node, cookies)
+            else:
+                result = await _probe_delay(clients.mihomo, node)
+            state.standby[node] = {**result, "probed_at": time.time()}
+            await _update_node_health([result])
+        except Exception as e:
+            logger.warning(f"standby probe failed: {e}")
+
+
 async def scan_and_switch() -> dict:
     """Scan candidate nodes and switch to the first healthy one.
 
@@ -195,46 +689,43 @@ async def scan_and_switch() -> dict:
 
     try:
         cookies = _parse_cookies(EX_COOKIES)
-        async with httpx.AsyncClient(proxy=PROXY_URL) as proxy_client:
-            # Use a separate client for mihomo API (no proxy needed)
-            async with httpx.AsyncClient() as mihomo_client:
-                # Refresh current node
-                state.current_node = await _mihomo_get_current(mihomo_client)
-
-                nodes = await _mihomo_get_urltest_groups(mihomo_client)
-                logger.info(f"scan started: {len(nodes)} URLTest groups, current={state.current_node}")
-
-                results = []
-                switched_to = None
-
-                for node in nodes:
-                    status = await _probe_node(proxy_client, node, cookies)
-                    results.append({"node": node, "status": status})
-                    if status == "ok":
-                        switched_to = node
-                        break
-
-                elapsed = time.time() - start_time
-                result = {
-                    "scanned": len(results),
-                    "results": results,
-                    "switched_to": switched_to,
-                    "elapsed_sec": round(elapsed, 1),
-                    "timestamp": time.time(),
-                }
-
-                if switched_to:
-                    state.last_scan_result = "switched"
-                    state.last_switched_to = switched_to
-                    state.current_node = switched_to
-                    logger.info(f"scan complete: switched to {switched_to} in {elapsed:.1f}s")
-                else:
-                    state.last_scan_result = "all_banned"
-                    logger.warning(f"scan complete: all nodes banned/unreachable in {elapsed:.1f}s")
+        mihomo_client, proxy_client = clients.mihomo, clients.select
+        # One fresh GET /proxies: the cache may predate a switch made
+        # outside this controller (mihomo UI, another leader).
+        topo = await _mihomo_get_topology(mihomo_client, max_age=0)
+        state.current_node = topo["select_now"]
+        nodes = _rank_nodes(topo["candidates"])
+        logger.info(f"scan started: {len(nodes)} URLTest groups, current={state.current_node}")
+
+        results, switched_to = await _try_standby(mihomo_client, proxy_client, cookies)
+        if not switched_to:
+            scan = _scan_parallel if PROBE_MODE == "parallel" else _scan_serial
+            scan_results, switched_to = await scan(mihomo_client, proxy_client, nodes, cookies)
+            results += scan_results
+        await _update_node_health(results)
+
+        elapsed = time.time() - start_time
+        result = {
+            "mode": PROBE_MODE,
+            "scanned": len(results),
+            "results": results,
+            "switched_to": switched_to,
+            "elapsed_sec": round(elapsed, 1),
+            "timestamp": time.time(),
+        }
+
+        if switched_to:
+            state.last_scan_result = "switched"
+            state.last_switched_to = switched_to
+            state.current_node = switched_to
+            logger.info(f"scan complete: switched to {switched_to} in {elapsed:.1f}s")
+        else:
+            state.last_scan_result = "all_banned"
+            logger.warning(f"scan complete: all nodes banned/unreachable in {elapsed:.1f}s")
 
-                state.scan_history.insert(0, result)
-                state.last_scan_at = time.time()
-                return result
+        state.scan_history.insert(0, result)
+        state.last_scan_at = time.time()
+        return result
 
     except Exception as e:
         result = {"error": str(e), "timestamp": time.time()}
@@ -246,62 +737,125 @@ async def scan_and_switch() -> dict:
         state.scan_in_progress = False
 
 
+LATEST_BAN_SQL = """
+    SELECT id, payload
+    FROM sync_task_events
+    WHERE event_type = 'proxy.banned'
+    ORDER BY id DESC
+    LIMIT 1
+"""
+
+
+def _ban_from_row(row) -> Optional[dict]:
+    if not row:
+        return None
+    event_id, payload = row
+    return {"id": event_id, "duration_secs": (payload or {}).get("duration_secs")}
+
+
 def _fetch_latest_ban_event() -> Optional[dict]:
-    """Check for recent proxy.banned events in sync_task_events.
+    """Latest proxy.banned event from sync_task_events (fallback path).
 
-    Returns the latest ban event if there's a new one since last check,
-    or None if no new ban events.
+    Served by idx_sync_task_events_type_id (one short index scan per
+    monthly partition).
     """
     conn = connection_pool.getconn()
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, event_type, message, payload, created_at
-            FROM sync_task_events
-            WHERE event_type = 'proxy.banned'
-            ORDER BY id DESC
-            LIMIT 1
-            """,
-        )
-        row = cur.fetchone()
-        if not row:
-            return None
-        event_id, event_type, message, payload, created_at = row
-        return {
-            "id": event_id,
-            "event_type": event_type,
-            "message": message,
-            "payload": payload or {},
-            "created_at": created_at,
-        }
+        with conn.cursor() as cur:
+            cur.execute(LATEST_BAN_SQL)
+            return _ban_from_row(cur.fetchone())
     finally:
-        cur.close()
+        conn.rollback()
         connection_pool.putconn(conn)
 
 
+class BanFeed:
+    """Hands proxy.banned events from the listener thread to the worker."""
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+
+    def bind(self) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        return self._queue
+
+    def unbind(self) -> None:
+        self._loop = None
+
+    def _put_threadsafe(self, event: Optional[dict]) -> None:
+        if event and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    # pg_listener callbacks (listener thread)
+
+    def _on_notify(self, conn, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            self._put_threadsafe({"id": int(data["id"]), "duration_secs": data.get("duration_secs")})
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"bad {BAN_CHANNEL} payload: {payload!r}")
+
+    def _on_connect(self, conn) -> None:
+        # Bans recorded while disconnected produced no notification.
+        if self._loop is None:
+            return
+        with conn.cursor() as cur:
+            cur.execute(LATEST_BAN_SQL)
+            self._put_threadsafe(_ban_from_row(cur.fetchone()))
+
+
+ban_feed = BanFeed()
+
+
+async def _next_ban_event() -> Optional[dict]:
+    """Wait up to POLL_INTERVAL_SEC for a pushed ban event; poll the table
+    instead only when the listener is not connected."""
+    try:
+        return await asyncio.wait_for(ban_feed._queue.get(), timeout=POLL_INTERVAL_SEC)
+    except asyncio.TimeoutError:
+        if listener.connected:
+            return None
+        return await run_in_threadpool(_fetch_latest_ban_event)
+
+
 async def _worker_loop():
-    """Background worker: poll for ban events and trigger scan_and_switch."""
+    """Background worker: wait for ban events and trigger scan_and_switch."""
     logger.info("proxy controller worker started")
-    last_seen_event_id = 0
+    last_seen_event_id = state.last_ban_event_id or 0
+    # Bans recorded before this process became leader produced notifications
+    # nobody here was bound to receive.
+    catch_up = True
 
     # Initialize: fetch current mihomo state
     if MIHOMO_API:
         try:
-            async with httpx.AsyncClient() as client:
-                state.current_node = await _mihomo_get_current(client)
-                logger.info(f"proxy controller initialized, current node: {state.current_node}")
+            topo = await _mihomo_get_topology(clients.mihomo, max_age=0)
+            state.current_node = topo["select_now"]
+            logger.info(
+                f"proxy controller initialized, current node: {state.current_node}, "
+                f"{len(topo['candidates'])} URLTest groups"
+            )
         except Exception as e:
             logger.warning(f"failed to get initial mihomo state: {e}")
+        try:
+            state.node_health = await run_in_threadpool(_load_node_health)
+        except Exception as e:
+            logger.warning(f"failed to load node health: {e}")
 
     while True:
         try:
-            event = _fetch_latest_ban_event()
+            if catch_up:
+                event = await run_in_threadpool(_fetch_latest_ban_event)
+                catch_up = False
+            else:
+                event = await _next_ban_event()
             if event and event["id"] > last_seen_event_id:
                 last_seen_event_id = event["id"]
+                state.last_ban_event_id = event["id"]
                 state.last_ban_event_at = time.time()
-                payload = event.get("payload") or {}
-                state.last_ban_duration = payload.get("duration_secs")
+                state.last_ban_duration = event.get("duration_secs")
 
                 logger.info(
                     f"ban event detected (id={event['id']}), "
@@ -317,13 +871,194 @@ async def _worker_loop():
 
         except Exception as e:
             logger.error(f"worker loop error: {e}")
+            await asyncio.sleep(POLL_INTERVAL_SEC)
+
+
+def _write_shared_state(snapshot: dict) -> None:
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO proxy_controller_state (id, leader, snapshot, updated_at)
+                VALUES (1, %s, %s, NOW())
+                ON CONFLICT (id) DO UPDATE
+                    SET leader = EXCLUDED.leader,
+                        snapshot = EXCLUDED.snapshot,
+                        updated_at = EXCLUDED.updated_at
+                """,
+                (INSTANCE_ID, Json(snapshot)),
+            )
+        conn.commit()
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
+
+
+def read_shared_state() -> Optional[dict]:
+    """The leader's last published snapshot, with a "leader" section."""
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT leader, snapshot, updated_at FROM proxy_controller_state WHERE id = 1")
+            row = cur.fetchone()
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
+    if not row:
+        return None
+    leader_id, snapshot, updated_at = row
+    snapshot["leader"] = {
+        "instance": leader_id,
+        "is_self": leader_id == INSTANCE_ID and leader.is_leader,
+        "updated_at": updated_at.timestamp(),
+    }
+    return snapshot
+
+
+def live_leader(shared: Optional[dict]) -> Optional[str]:
+    """Instance id of the leader if its heartbeat in `shared` (from
+    read_shared_state) is recent enough to trust it is listening."""
+    info = (shared or {}).get("leader")
+    if not info or time.time() - info["updated_at"] > LEADER_STALE_SEC:
+        return None
+    return info["instance"]
+
+
+def forward_command(command: dict) -> None:
+    """Ask the leader to run `command` ({"action": "scan"} or
+    {"action": "switch", "node": ...}).
+
+    Fire-and-forget over NOTIFY: delivery is at most once. A leader that
+    dies or loses its listener connection before running it drops the
+    command, and nothing reports back to the caller.
+    """
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)", (COMMAND_CHANNEL, json.dumps(command)))
+        conn.commit()
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
 
-        await asyncio.sleep(POLL_INTERVAL_SEC)
+
+_loop: asyncio.AbstractEventLoop | None = None
+_leader_task: asyncio.Task | None = None
+# Running forwarded commands; cancelled with the worker on lost leadership.
+_command_tasks: set[asyncio.Task] = set()
+
+
+async def _run_command(command: dict) -> None:
+    try:
+        if command.get("action") == "scan":
+            await scan_and_switch()
+        elif command.get("action") == "switch" and command.get("node"):
+            await switch_node(command["node"])
+        else:
+            logger.warning(f"unknown proxy controller command: {command}")
+    except Exception as e:
+        logger.error(f"proxy controller command {command} failed: {e}")
+
+
+def _on_command(conn, payload: str) -> None:
+    """pg_listener callback (listener thread): run forwarded commands on the leader."""
+    if not leader.is_leader or _loop is None:
+        return
+    try:
+        command = json.loads(payload)
+    except ValueError:
+        logger.warning(f"bad {COMMAND_CHANNEL} payload: {payload!r}")
+        return
+    _loop.call_soon_threadsafe(_spawn_command, command)
+
+
+def _spawn_command(command: dict) -> None:
+    task = asyncio.create_task(_run_command(command))
+    _command_tasks.add(task)
+    task.add_done_callback(_command_tasks.discard)
+
+
+async def _publish_state(last: dict) -> None:
+    """Write the snapshot to proxy_controller_state if it changed or the
+    heartbeat is due. `last` carries the previous write between calls."""
+    snapshot = state.snapshot()
+    encoded = json.dumps(snapshot, sort_keys=True, default=str)
+    if encoded == last.get("encoded") and time.time() - last.get("at", 0) < STATE_HEARTBEAT_SEC:
+        return
+    await run_in_threadpool(_write_shared_state, snapshot)
+    last.update(encoded=encoded, at=time.time())
+
+
+async def _leader_loop():
+    """Hold or contend for the controller lock; run the controller tasks
+    only while this process is the leader."""
+    tasks: list[asyncio.Task] = []
+    published: dict = {}
+    try:
+        while True:
+            is_leader = await run_in_threadpool(leader.try_acquire)
+
+            if is_leader and not tasks:
+                logger.info(f"elected proxy controller leader ({INSTANCE_ID})")
+                try:
+                    shared = await run_in_threadpool(read_shared_state)
+                    if shared:
+                        state.resume(shared)
+                except Exception as e:
+                    logger.warning(f"failed to read shared controller state: {e}")
+                published.clear()  # another leader may have written since
+                ban_feed.bind()
+                tasks.append(asyncio.create_task(_worker_loop()))
+                if STANDBY_NODES > 0 and EX_COOKIES:
+                    tasks.append(asyncio.create_task(_standby_loop()))
+            elif not is_leader and tasks:
+                logger.warning("lost proxy controller leadership, stopping worker")
+                ban_feed.unbind()
+                for task in [*tasks, *_command_tasks]:
+                    task.cancel()
+                tasks.clear()
+                state.scan_in_progress = False
+
+            if is_leader:
+                try:
+                    await _publish_state(published)
+                except Exception as e:
+                    logger.warning(f"failed to publish controller state: {e}")
+
+            await asyncio.sleep(LEADER_CHECK_SEC)
+    finally:
+        # Shutdown: stop the children before close_clients() closes the
+        # HTTP clients they use.
+        ban_feed.unbind()
+        children = [*tasks, *_command_tasks]
+        for task in children:
+            task.cancel()
+        await asyncio.gather(*children, return_exceptions=True)
 
 
 def start_worker():
-    """Start the proxy controller background worker."""
+    """Start contending for proxy controller leadership; the winner runs the
+    background worker."""
+    global _loop, _leader_task
     if not MIHOMO_API:
         logger.warning("MIHOMO_API not set, proxy controller disabled")
         return
-    asyncio.create_task(_worker_loop())
+    _loop = asyncio.get_running_loop()
+    clients.open()
+    _leader_task = asyncio.create_task(_leader_loop())
+
+
+async def close_clients():
+    """App shutdown: stop the leader loop and its worker, standby and
+    command tasks, then close pooled HTTP clients and give up leadership so
+    another worker takes over without waiting for the session to time out."""
+    if _leader_task is not None:
+        _leader_task.cancel()
+        await asyncio.gather(_leader_task, return_exceptions=True)
+    await clients.aclose()
+    await run_in_threadpool(leader.release)
+
+
+listener.subscribe(BAN_CHANNEL, ban_feed._on_notify, on_connect=ban_feed._on_connect)
+listener.subscribe(COMMAND_CHANNEL, _on_command)
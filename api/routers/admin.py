@@ -1,3 +1,4 @@
+import asyncio
 import json
 import math
 import time
@@ -6,17 +7,30 @@ from typing import Any, Dict
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-
-from db import get_cursor, get_db
+from starlette.concurrency import run_in_threadpool
+
+import compression
+import dashboard_snapshot
+import event_broker
+import maintenance
+import profiles
+import settings_cache
+import similarity_cdf
+import similarity_engine
+from db import connection_pool, get_cursor, get_db
 from models import (
     EmbeddingsStatus,
     FAVORITES_CATEGORY,
     MIXED_CATEGORY,
     REFRESH_CATEGORY,
+    RecommendationProfile,
+    RecommendationProfileCreate,
     SimilarityDistribution,
     SyncTask,
     SyncTaskCreate,
     SyncTaskUpdate,
+    TaskEventSummary,
+    ThresholdPreview,
     ThumbQueueStats,
     VALID_CATEGORIES,
 )
@@ -434,56 +448,84 @@ def get_task(task_id: int, db=Depends(get_db)):
     return _get_task_or_404(task_id, db)
 
 
+# Seconds without events before a keepalive ping.
+SSE_PING_SEC = 15.0
+
+
 @router.get("/events")
-def admin_events(
+async def admin_events(
     after_id: int = Query(0, ge=0),
     last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
 ):
+    """Task events as SSE. Live events come from the shared event_broker;
+    `after_id` / Last-Event-ID resume by backfilling from the table first."""
     try:
         resumed_after = int(last_event_id) if last_event_id else 0
     except (TypeError, ValueError):
         resumed_after = 0
     start_after = max(after_id, resumed_after)
 
-    def stream():
-        last_id = start_after
-        while True:
-            emitted = False
-            with get_cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT id, task_id, job_id, event_type, message, payload, created_at
-                    FROM sync_task_events
-                    WHERE id > %s
-                    ORDER BY id ASC
-                    LIMIT 100
-                    """,
-                    (last_id,),
-                )
-                for row in cur.fetchall():
-                    event_id, task_id, job_id, event_type, message, payload, created_at = row
-                    last_id = event_id
-                    emitted = True
-                    yield _sse(
-                        {
-                            "id": event_id,
-                            "task_id": task_id,
-                            "job_id": job_id,
-                            "type": event_type,
-                            "message": message,
-                            "payload": payload or {},
-                            "created_at": created_at,
-                        },
-                        event="admin.task",
-                        event_id=event_id,
-                    )
-            if not emitted:
-                yield _sse({"ts": time.time()}, event="ping")
-            time.sleep(5)
+    def backfill(after: int) -> list[dict]:
+        with get_cursor() as cur:
+            return event_broker.fetch_after(cur, after)
+
+    async def stream():
+        # Subscribe before backfilling so nothing committed in between is
+        # lost; ids already sent from the backfill are skipped on the queue.
+        sub = event_broker.broker.subscribe()
+        try:
+            sent: set[int] = set()
+            if start_after:
+                last = start_after
+                while True:
+                    events = await run_in_threadpool(backfill, last)
+                    for ev in events:
+                        sent.add(ev["id"])
+                        yield _sse(ev, event="admin.task", event_id=ev["id"])
+                    if len(events) < event_broker.FETCH_LIMIT:
+                        break
+                    last = events[-1]["id"]
+
+            while not sub.overflowed:
+                try:
+                    ev = await asyncio.wait_for(sub.queue.get(), timeout=SSE_PING_SEC)
+                except asyncio.TimeoutError:
+                    yield _sse({"ts": time.time()}, event="ping")
+                    continue
+                if ev["id"] in sent:
+                    continue
+                yield _sse(ev, event="admin.task", event_id=ev["id"])
+            # Queue overflowed: end the stream; EventSource reconnects with
+            # Last-Event-ID and catches up through the backfill.
+        finally:
+            event_broker.broker.unsubscribe(sub)
 
     return StreamingResponse(stream(), media_type="text/event-stream")
 
 
+@router.post("/events/maintenance")
+def task_events_maintenance():
+    """Run sync_task_events partition maintenance, compaction and retention
+    now (also runs hourly in the background)."""
+    return maintenance.run_task_events_maintenance()
+
+
+@router.get("/tasks/{task_id}/event-summaries", response_model=list[TaskEventSummary])
+def task_event_summaries(task_id: int, days: int = Query(30, ge=1, le=3650), db=Depends(get_db)):
+    """Daily per-type counts of this task's compacted events."""
+    db.execute(
+        """
+        SELECT task_id, event_type, day, event_count, first_at, last_at, last_payload
+        FROM sync_task_event_summaries
+        WHERE task_id = %s AND day >= CURRENT_DATE - %s
+        ORDER BY day DESC, event_type
+        """,
+        (task_id, days),
+    )
+    cols = [d[0] for d in db.description]
+    return [TaskEventSummary(**dict(zip(cols, r))) for r in db.fetchall()]
+
+
 @router.patch("/tasks/{task_id}", response_model=SyncTask)
 def patch_task(task_id: int, payload: SyncTaskUpdate, db=Depends(get_db)):
     db.execute("SELECT id, name, source, strategy, config FROM sync_task_defs WHERE id = %s", (task_id,))
@@ -599,40 +641,70 @@ def delete_task(task_id: int, confirm: bool = Query(False), db=Depends(get_db)):
     return None
 
 
+# Ledger rows in thumb_queue_counts before a stats read folds them back to
+# one row per status (compact_thumb_queue_counts, migrations/016).
+THUMB_COUNTS_COMPACT_ROWS = 500
+
+
 @router.get("/thumb-queue/stats", response_model=ThumbQueueStats)
 def thumb_queue_stats(db=Depends(get_db)):
+    # Per-status totals come from the trigger-maintained ledger; only
+    # "waiting" (pending with a future retry) depends on NOW() and is counted
+    # through the partial retry index.
+    db.execute("SELECT status, SUM(n)::bigint, COUNT(*) FROM thumb_queue_counts GROUP BY status")
+    rows = db.fetchall()
+    counts = {status: total for status, total, _ in rows}
+    if sum(r[2] for r in rows) > THUMB_COUNTS_COMPACT_ROWS:
+        db.execute("SELECT compact_thumb_queue_counts()")
+
     db.execute(
-        """
-        SELECT
-            COALESCE(SUM(CASE WHEN status = 'pending' AND (next_retry_at IS NULL OR next_retry_at <= NOW()) THEN 1 ELSE 0 END), 0) AS pending,
-            COALESCE(SUM(CASE WHEN status = 'processing' THEN 1 ELSE 0 END), 0) AS processing,
-            COALESCE(SUM(CASE WHEN status = 'done' THEN 1 ELSE 0 END), 0) AS done,
-            COALESCE(SUM(CASE WHEN status = 'pending' AND next_retry_at > NOW() THEN 1 ELSE 0 END), 0) AS waiting
-        FROM thumb_queue
-        """
+        "SELECT COUNT(*) FROM thumb_queue WHERE status = 'pending' AND next_retry_at > NOW()"
     )
-    row = db.fetchone()
+    waiting = db.fetchone()[0]
     return ThumbQueueStats(
-        pending=row[0],
-        processing=row[1],
-        done=row[2],
-        waiting=row[3],
+        pending=max(counts.get("pending", 0) - waiting, 0),
+        processing=counts.get("processing", 0),
+        done=counts.get("done", 0),
+        waiting=waiting,
+        failed=counts.get("failed", 0),
+        archived=counts.get("archived", 0),
     )
 
 
+@router.post("/thumb-queue/archive")
+def archive_thumb_queue(
+    older_than_days: int = Query(7, ge=0),
+    limit: int = Query(50000, ge=1, le=500000),
+    db=Depends(get_db),
+):
+    """Move done rows processed more than `older_than_days` ago out of
+    thumb_queue into thumb_queue_archive. Archived gids are not re-queued
+    unless their thumb URL changes."""
+    db.execute(
+        "SELECT archive_done_thumbs(make_interval(days => %s), %s)",
+        (older_than_days, limit),
+    )
+    return {"archived": db.fetchone()[0]}
+
+
+@router.get("/compression/stats")
+def compression_stats():
+    """Response compression counters: encodings used, cache hits, ratio, time."""
+    return compression.stats.snapshot()
+
+
 # ── Similarity Distribution & Threshold (cosine recommendation) ───────────────
 
 DEFAULT_SIMILARITY_THRESHOLD = 0.3
 
 
 def get_similarity_threshold(db) -> float:
-    """Read the persisted similarity threshold from app_settings."""
-    db.execute("SELECT value FROM app_settings WHERE key = 'similarity_threshold'")
-    row = db.fetchone()
-    if not row:
+    """Persisted similarity threshold from app_settings (via settings_cache)."""
+    value = settings_cache.get("similarity_threshold", db)
+    if value is None:
         return DEFAULT_SIMILARITY_THRESHOLD
     try:
-        return float(row[0])
+        return float(value)
     except (TypeError, ValueError):
         return DEFAULT_SIMILARITY_THRESHOLD
 
@@ -641,50 +713,43 @@ def get_similarity_threshold(db) -> float:
 def recommended_distribution(buckets: int = Query(40, ge=10, le=200), db=Depends(get_db)):
     threshold = get_similarity_threshold(db)
 
-    # Compute similarity for every gallery whose embedding exists, against the
-    # single user_profile vector. Materialize once in a CTE to drive both the
-    # histogram and the count-above-threshold.
-    # similarity is precomputed in recommended_cache by the embeddings worker.
-    # Reading is now an indexed column scan; no per-request cosine compute.
-    db.execute(
-        """
-        SELECT COUNT(*), COALESCE(MIN(similarity), 0)::float, COALESCE(MAX(similarity), 1)::float
-        FROM recommended_cache
-        WHERE similarity IS NOT NULL
-        """,
-    )
-    total, lo, hi = db.fetchone()
-    if not total or total == 0:
+    # Histogram and count-above are binary searches over the cached sorted
+    # similarities (similarity_cdf); Postgres is only read when the cache is
+    # stale.
+    cdf = similarity_cdf.get(db)
+    if not cdf.total:
         return SimilarityDistribution(buckets=[], total=0, threshold=threshold, count_above=0)
 
-    lo = max(0.0, min(1.0, lo))
-    hi = max(lo, min(1.0, hi))
-    bucket_width = (hi - lo) / buckets if hi > lo else 1.0
-
-    db.execute(
-        """
-        SELECT width_bucket(similarity, %(lo)s, %(hi_adj)s, %(n)s) AS bucket, COUNT(*) AS cnt
-        FROM recommended_cache
-        WHERE similarity IS NOT NULL
-        GROUP BY bucket
-        ORDER BY bucket
-        """,
-        {"lo": lo, "hi_adj": hi + 1e-6, "n": buckets},
+    return SimilarityDistribution(
+        buckets=cdf.histogram(buckets),
+        total=cdf.total,
+        threshold=threshold,
+        count_above=cdf.count_above(threshold),
     )
-    bucket_map = {r[0]: r[1] for r in db.fetchall()}
-    result = []
-    for i in range(1, buckets + 1):
-        b_lo = lo + (i - 1) * bucket_width
-        b_hi = lo + i * bucket_width
-        result.append({"min": round(b_lo, 4), "max": round(b_hi, 4), "count": bucket_map.get(i, 0)})
 
-    db.execute(
-        "SELECT COUNT(*) FROM recommended_cache WHERE similarity >= %s",
-        (threshold,),
-    )
-    count_above = db.fetchone()[0]
 
-    return SimilarityDistribution(buckets=result, total=total, threshold=threshold, count_above=count_above)
+@router.get("/recommended/preview", response_model=ThresholdPreview)
+def preview_threshold(threshold: float = Query(..., ge=0, le=1), db=Depends(get_db)):
+    """What-if for the admin slider: galleries a threshold would keep."""
+    cdf = similarity_cdf.get(db)
+    return ThresholdPreview(threshold=threshold, total=cdf.total, count_above=cdf.count_above(threshold))
+
+
+@router.post("/recommended/recompute")
+def recompute_similarity(dry_run: bool = Query(False)):
+    """Recompute every recommended_cache.similarity with the vectorized engine.
+
+    Uses a dedicated pooled connection because the engine commits once per
+    write batch. Returns row counts and per-stage timings.
+    """
+    conn = connection_pool.getconn()
+    try:
+        return similarity_engine.recompute_similarity(conn, dry_run=dry_run)
+    except similarity_engine.RecomputeBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
 
 
 class ThresholdUpdate(BaseModel):
@@ -702,32 +767,106 @@ def update_threshold(payload: ThresholdUpdate, db=Depends(get_db)):
         """,
         (json.dumps(payload.threshold),),
     )
+    settings_cache.set_local("similarity_threshold", payload.threshold)
     return {"threshold": payload.threshold}
 
 
 @router.get("/recommended/embeddings-status", response_model=EmbeddingsStatus)
 def embeddings_status(db=Depends(get_db)):
-    db.execute(
-        """
-        SELECT
-            (SELECT COUNT(*) FROM tag_vocabulary WHERE is_active = TRUE),
-            (SELECT dim_count FROM tag_vocabulary_meta WHERE id = 1),
-            (SELECT COUNT(*) FROM eh_galleries WHERE is_active = TRUE),
-            (SELECT COUNT(*) FROM recommended_cache rc JOIN eh_galleries g ON g.gid = rc.gid
-              WHERE g.is_active = TRUE AND rc.tag_embedding IS NOT NULL),
-            (SELECT COUNT(*) FROM recommended_cache rc JOIN eh_galleries g ON g.gid = rc.gid
-              WHERE g.is_active = TRUE AND rc.tag_embedding IS NULL),
-            (SELECT liked_count FROM user_profile WHERE id = 1),
-            (SELECT embedding IS NOT NULL FROM user_profile WHERE id = 1)
-        """
-    )
-    vocab_size, dim_count, total_g, embedded, pending, liked, ready = db.fetchone()
-    return EmbeddingsStatus(
-        vocab_size=vocab_size or 0,
-        dim_count=dim_count or 0,
-        total_galleries=total_g or 0,
-        embedded_count=embedded or 0,
-        pending_count=pending or 0,
-        profile_liked_count=liked or 0,
-        profile_ready=bool(ready),
+    value, as_of = dashboard_snapshot.get(db, "embeddings_status")
+    return EmbeddingsStatus(**value, as_of=as_of)
+
+
+# ── Named recommendation profiles ─────────────────────────────────────────────
+
+PROFILE_SELECT = """
+    SELECT id, name, categories, tag_filter, top_n, liked_count, scored_count, built_at, created_at
+    FROM recommendation_profiles
+"""
+
+
+def _profile_from_row(row) -> RecommendationProfile:
+    return RecommendationProfile(
+        id=row[0],
+        name=row[1],
+        categories=row[2] or [],
+        tags=profiles.tags_of(row[3] or {}),
+        top_n=row[4],
+        liked_count=row[5],
+        scored_count=row[6],
+        built_at=row[7],
+        created_at=row[8],
     )
+
+
+def _rebuild_profiles(profile_ids: list[int] | None) -> list[dict]:
+    # Dedicated pooled connection: the builder commits once per profile.
+    conn = connection_pool.getconn()
+    try:
+        return profiles.rebuild_profiles(conn, profile_ids)
+    except profiles.ProfileNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    finally:
+        conn.rollback()
+        connection_pool.putconn(conn)
+
+
+@router.get("/profiles", response_model=list[RecommendationProfile])
+def list_profiles(db=Depends(get_db)):
+    db.execute(PROFILE_SELECT + " ORDER BY name")
+    return [_profile_from_row(r) for r in db.fetchall()]
+
+
+@router.post("/profiles", response_model=RecommendationProfile, status_code=status.HTTP_201_CREATED)
+def create_profile(payload: RecommendationProfileCreate):
+    """Create a named profile from a favorites subset and build its ranking."""
+    name = payload.name.strip()
+    if not name:
+        raise HTTPException(status_code=422, detail="Profile name is required")
+    invalid = [c for c in payload.categories if c not in VALID_CATEGORIES]
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Unknown categories: {', '.join(invalid)}")
+    if not 1 <= payload.top_n <= 100000:
+        raise HTTPException(status_code=422, detail="top_n must be in [1, 100000]")
+    try:
+        tag_filter = profiles.tag_filter_from(payload.tags)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    with get_cursor() as db:
+        db.execute(
+            """
+            INSERT INTO recommendation_profiles (name, categories, tag_filter, top_n)
+            VALUES (%s, %s, %s::jsonb, %s)
+            ON CONFLICT (name) DO NOTHING
+            RETURNING id
+            """,
+            (name, payload.categories, json.dumps(tag_filter), payload.top_n),
+        )
+        row = db.fetchone()
+    if not row:
+        raise HTTPException(status_code=409, detail=f"Profile {name!r} already exists")
+
+    _rebuild_profiles([row[0]])
+    with get_cursor() as db:
+        db.execute(PROFILE_SELECT + " WHERE id = %s", (row[0],))
+        return _profile_from_row(db.fetchone())
+
+
+@router.delete("/profiles/{profile_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_profile(profile_id: int, db=Depends(get_db)):
+    db.execute("DELETE FROM recommendation_profiles WHERE id = %s RETURNING id", (profile_id,))
+    if not db.fetchone():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return None
+
+
+@router.post("/profiles/rebuild")
+def rebuild_all_profiles():
+    """Rebuild every named profile, e.g. after favorites changed."""
+    return _rebuild_profiles(None)
+
+
+@router.post("/profiles/{profile_id}/rebuild")
+def rebuild_profile(profile_id: int):
+    return _rebuild_profiles([profile_id])[0]
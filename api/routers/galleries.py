@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from typing import Optional, List
+from fastapi.responses import JSONResponse
+from typing import Optional, List, Dict, Literal
+from datetime import datetime
+from decimal import Decimal
 from db import get_db
 from models import Gallery, GalleryComment, GalleryList
 from routers.admin import get_similarity_threshold
+import tag_index
 import math
 import os
 import json
@@ -64,29 +68,193 @@ def _build_where(category, language, min_rating, min_fav, tag):
     if tag:
         tags = tag if isinstance(tag, list) else [tag]
         for t in tags:
-            t = t.replace("\uff1a", ":").strip()
-            if t and ":" in t:
-                ns, val = t.split(":", 1)
-                ns, val = ns.strip().lower(), val.strip()
-                if ns and val:
-                    parts.append("g.tags @> %s::jsonb")
-                    params.append(json.dumps({ns: [val]}))
+            parsed = _parse_tag(t)
+            if parsed:
+                ns, val = parsed
+                parts.append("g.tags @> %s::jsonb")
+                params.append(json.dumps({ns: [val]}))
 
     return parts, params
 
 
+def _parse_tag(t: str) -> Optional[tuple[str, str]]:
+    """Parse "ns:value" (full-width colon accepted) into (ns, value)."""
+    t = t.replace("\uff1a", ":").strip()
+    if t and ":" in t:
+        ns, val = t.split(":", 1)
+        ns, val = ns.strip().lower(), val.strip()
+        if ns and val:
+            return ns, val
+    return None
+
+
+# collapse=group: keep ungrouped galleries plus the single representative of
+# each version group, maintained by triggers in
+# migrations/010_group_representatives.sql (unique index lookup on gid).
+# The maintained representative is ranked over *all* members, so this is
+# only correct for an unfiltered listing; see _collapse_filtered.
+_COLLAPSE_GROUP_SQL = """(ggm.group_id IS NULL OR EXISTS (
+    SELECT 1 FROM gallery_group_representatives rep WHERE rep.gid = g.gid
+))"""
+
+
+def _collapse_filtered(query: str) -> str:
+    """Wrap an already-filtered listing query (no ORDER BY) so it keeps the
+    best *matching* member of each version group, ranked like
+    refresh_group_representative. Ungrouped rows key on -gid so each stays
+    its own bucket. The result is aliased as g so callers' ORDER BY applies.
+    """
+    return f"""
+        SELECT * FROM (
+            SELECT DISTINCT ON (COALESCE(grp.group_id, -grp.gid)) grp.*
+            FROM ({query}) grp
+            ORDER BY COALESCE(grp.group_id, -grp.gid),
+                     grp.fav_count DESC NULLS LAST,
+                     grp.posted_at DESC NULLS LAST,
+                     grp.gid DESC
+        ) g
+    """
+
+
 def _rows_to_galleries(db, rows):
     col_names = [desc[0] for desc in db.description]
     return [Gallery(**dict(zip(col_names, row))) for row in rows]
 
 
-def _get_recommended(*, db, category, language, min_rating, min_fav, tag, is_favorited, page, page_size, offset):
-    """Recommended: query precomputed similarity in recommended_cache, ORDER BY index."""
+GALLERY_COLUMNS = list(Gallery.model_fields)
+
+
+def _columnar_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _rows_to_columnar(db, rows, tag_ids: dict[str, int]) -> list[list]:
+    """Encode rows as arrays in GALLERY_COLUMNS order, skipping pydantic.
+
+    Tags become a list of indices into the page-wide tag table (`tag_ids`,
+    "ns:value" -> index), so repeated tags like language:chinese are sent once.
+    Columns missing from the query fall back to the Gallery field default.
+    """
+    col_names = [desc[0] for desc in db.description]
+    positions = [col_names.index(c) if c in col_names else None for c in GALLERY_COLUMNS]
+    defaults = [Gallery.model_fields[c].default for c in GALLERY_COLUMNS]
+    tags_col = GALLERY_COLUMNS.index("tags")
+
+    out = []
+    for row in rows:
+        values = [
+            _columnar_value(row[pos]) if pos is not None else default
+            for pos, default in zip(positions, defaults)
+        ]
+        tags = values[tags_col]
+        if tags:
+            encoded = []
+            for ns, vals in tags.items():
+                for val in vals:
+                    key = f"{ns}:{val}"
+                    idx = tag_ids.get(key)
+                    if idx is None:
+                        idx = tag_ids[key] = len(tag_ids)
+                    encoded.append(idx)
+            values[tags_col] = encoded
+        out.append(values)
+    return out
+
+
+GROUP_EXPAND_LIMIT = 50
+
+# Members of many groups in one round-trip. Same filter/order/count semantics
+# as get_gallery_group, capped at GROUP_EXPAND_LIMIT per group; the window
+# count runs before the LIMIT so group_count stays the full member count.
+# A group with fewer member rows than group_count was truncated, and
+# clients should fetch /group/{id} for the rest.
+_GROUP_MEMBERS_SQL = """
+    SELECT m.*
+    FROM unnest(%s::bigint[]) AS q(group_id)
+    CROSS JOIN LATERAL (
+        SELECT g.*, (f.gid IS NOT NULL) AS is_favorited, f.favorited_at,
+               ggm.group_id,
+               COUNT(*) OVER () AS group_count
+        FROM gallery_group_members ggm
+        JOIN eh_galleries g ON g.gid = ggm.gid
+        LEFT JOIN user_favorites f ON g.gid = f.gid
+        WHERE ggm.group_id = q.group_id AND g.is_active = TRUE AND g.parent_gid IS NULL
+        ORDER BY g.posted_at ASC
+        LIMIT %s
+    ) m
+    ORDER BY m.group_id, m.posted_at ASC
+"""
+
+
+def _list_response(db, rows, *, total, page, page_size, fmt, expand_groups=False):
+    """Build a list response as a GalleryList or, for fmt="columnar", as
+    {columns, rows, tag_table, total, page, size, pages} sent as raw JSON.
+
+    With expand_groups, members of every group on the page are attached as
+    `groups` in the same encoding (columnar members share the tag table).
+    """
+    pages = math.ceil(total / page_size) if total else 0
+    columnar = fmt == "columnar"
+    tag_ids: dict[str, int] = {}
+    encode = (lambda r: _rows_to_columnar(db, r, tag_ids)) if columnar else (lambda r: _rows_to_galleries(db, r))
+
+    group_col = [desc[0] for desc in db.description].index("group_id")
+    items = encode(rows)
+
+    groups = None
+    if expand_groups:
+        groups = {}
+        group_ids = list(dict.fromkeys(r[group_col] for r in rows if r[group_col] is not None))
+        if group_ids:
+            db.execute(_GROUP_MEMBERS_SQL, (group_ids, GROUP_EXPAND_LIMIT))
+            member_rows = db.fetchall()
+            member_col = [desc[0] for desc in db.description].index("group_id")
+            for row, member in zip(member_rows, encode(member_rows)):
+                groups.setdefault(row[member_col], []).append(member)
+
+    if columnar:
+        return JSONResponse({
+            "columns": GALLERY_COLUMNS,
+            "rows": items,
+            "tag_table": list(tag_ids),
+            "groups": groups,
+            "total": total,
+            "page": page,
+            "size": page_size,
+            "pages": pages,
+        })
+    return GalleryList(
+        items=items, total=total, page=page,
+        size=page_size, pages=pages, groups=groups,
+    )
+
+
+def _get_recommended(*, db, category, language, min_rating, min_fav, tag, is_favorited, page, page_size, offset, fmt, expand_groups, collapse, profile=None):
+    """Recommended: query precomputed similarity in recommended_cache, ORDER BY index.
+
+    With `profile`, ranks by that named profile's top-N in profile_similarity
+    instead (aliased as rc so the rest of the query is shared). The stored
+    top-N is the cutoff there, so the global threshold is not applied.
+    """
     where_parts, params = _build_where(category, language, min_rating, min_fav, tag)
 
-    threshold = get_similarity_threshold(db)
-    where_parts.append("rc.similarity >= %s")
-    params.append(threshold)
+    if profile:
+        db.execute("SELECT id FROM recommendation_profiles WHERE name = %s", (profile,))
+        row = db.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Recommendation profile not found")
+        source = "profile_similarity rc"
+        where_parts.append("rc.profile_id = %s")
+        params.append(row[0])
+    else:
+        source = "recommended_cache rc"
+        threshold = get_similarity_threshold(db)
+        where_parts.append("rc.similarity >= %s")
+        params.append(threshold)
     where_parts.append("g.is_active = TRUE")
     # Hide galleries that have a newer version (parent_gid is set on the
     # older, replaced version). parent_gid is only populated after a detail
@@ -108,7 +276,7 @@ def _get_recommended(*, db, category, language, min_rating, min_fav, tag, is_fav
                f.favorited_at,
                ggm.group_id,
                COALESCE(gc.cnt, 0) AS group_count
-        FROM recommended_cache rc
+        FROM {source}
         JOIN eh_galleries g ON g.gid = rc.gid
         LEFT JOIN user_favorites f ON g.gid = f.gid
         LEFT JOIN gallery_group_members ggm ON g.gid = ggm.gid
@@ -125,8 +293,13 @@ def _get_recommended(*, db, category, language, min_rating, min_fav, tag, is_fav
             JOIN user_favorites f2 ON f2.gid = ggm2.gid
         ) gf ON gf.group_id = ggm.group_id
         WHERE {where_sql}
-        ORDER BY rc.similarity DESC, g.gid DESC
     """
+    # The similarity threshold / profile cutoff always filters, so the
+    # maintained representatives never apply here.
+    if collapse == "group":
+        query = _collapse_filtered(query) + " ORDER BY g.similarity DESC, g.gid DESC"
+    else:
+        query += " ORDER BY rc.similarity DESC, g.gid DESC"
 
     count_query = f"SELECT COUNT(*) FROM ({query}) AS sub"
     db.execute(count_query, params)
@@ -136,11 +309,9 @@ def _get_recommended(*, db, category, language, min_rating, min_fav, tag, is_fav
     params.extend([page_size, offset])
 
     db.execute(query, params)
-    items = _rows_to_galleries(db, db.fetchall())
-
-    return GalleryList(
-        items=items, total=total, page=page, size=page_size,
-        pages=math.ceil(total / page_size) if total else 0,
+    return _list_response(
+        db, db.fetchall(), total=total, page=page, page_size=page_size,
+        fmt=fmt, expand_groups=expand_groups,
     )
 
 
@@ -155,22 +326,42 @@ def get_galleries(
     sort: Optional[str] = "gid_desc",
     page: int = 1,
     page_size: int = 24,
+    format: Literal["json", "columnar"] = "json",
+    expand: Optional[List[str]] = Query(None),
+    collapse: Optional[Literal["group"]] = None,
+    profile: Optional[str] = None,
     db = Depends(get_db)
 ):
+    """List galleries. `format=columnar` returns a compact column header +
+    row arrays with a dictionary-encoded tag table; `expand=group` inlines the
+    members of every version group on the page (see _list_response);
+    `collapse=group` returns one representative per version group;
+    `profile=<name>` with sort=recommended ranks by a named profile."""
     offset = (page - 1) * page_size
+    expand_groups = bool(expand) and "group" in expand
 
     if sort == "recommended":
         return _get_recommended(
             db=db, category=category, language=language, min_rating=min_rating,
             min_fav=min_fav, tag=tag, is_favorited=is_favorited,
-            page=page, page_size=page_size, offset=offset,
+            page=page, page_size=page_size, offset=offset, fmt=format,
+            expand_groups=expand_groups, collapse=collapse, profile=profile,
         )
 
     # Standard query with LEFT JOIN for favorites info
     where_parts, params = _build_where(category, language, min_rating, min_fav, tag)
+    # Only request filters disqualify the maintained representatives. The
+    # static TAG_BLACKLIST is not counted: its rules target the work's
+    # content, which every version in a group shares, so a blacklisted
+    # representative means the whole group is hidden anyway.
+    filtered = bool(category or language or tag) or any(
+        v is not None for v in (min_rating, min_fav, is_favorited)
+    )
     where_parts.append("g.is_active = TRUE")
     # See _get_recommended for the parent_gid filter rationale.
     where_parts.append("g.parent_gid IS NULL")
+    if collapse == "group" and not filtered:
+        where_parts.append(_COLLAPSE_GROUP_SQL)
 
     if is_favorited is True:
         where_parts.append("f.gid IS NOT NULL")
@@ -202,6 +393,8 @@ def get_galleries(
         ) gf ON gf.group_id = ggm.group_id
         WHERE {where_sql}
     """
+    if collapse == "group" and filtered:
+        query = _collapse_filtered(query)
 
     # Sort
     if sort == "rating":
@@ -226,9 +419,10 @@ def get_galleries(
     params.extend([page_size, offset])
 
     db.execute(query, params)
-    items = _rows_to_galleries(db, db.fetchall())
-
-    return GalleryList(items=items, total=total, page=page, size=page_size, pages=math.ceil(total / page_size) if total else 0)
+    return _list_response(
+        db, db.fetchall(), total=total, page=page, page_size=page_size,
+        fmt=format, expand_groups=expand_groups,
+    )
 
 @router.get("/group/{group_id}", response_model=List[Gallery])
 def get_gallery_group(group_id: int, db = Depends(get_db)):
@@ -251,36 +445,200 @@ def get_gallery_group(group_id: int, db = Depends(get_db)):
     return _rows_to_galleries(db, rows)
 
 
+# Per-gallery enrichment shared by the single and batch lookups: similarity,
+# favorite state and the active member count of the gallery's version group.
+# The LATERAL count only touches the groups of the selected rows instead of
+# aggregating every group in the table.
+_DETAIL_SELECT = """
+    SELECT g.*, rc.similarity,
+           (f.gid IS NOT NULL) AS is_favorited, f.favorited_at,
+           ggm.group_id,
+           COALESCE(gc.cnt, 0) AS group_count
+    FROM eh_galleries g
+    LEFT JOIN recommended_cache rc ON rc.gid = g.gid
+    LEFT JOIN user_favorites f ON g.gid = f.gid
+    LEFT JOIN gallery_group_members ggm ON g.gid = ggm.gid
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS cnt
+        FROM gallery_group_members ggmc
+        JOIN eh_galleries gc2 ON gc2.gid = ggmc.gid
+        WHERE ggmc.group_id = ggm.group_id AND gc2.is_active = TRUE
+    ) gc ON TRUE
+"""
+
+BATCH_MAX_GIDS = 300
+
+
+@router.get("/batch", response_model=Dict[int, Gallery])
+def get_galleries_batch(
+    gid: List[int] = Query(...),
+    db = Depends(get_db),
+):
+    """Resolve many galleries in one query. Unknown gids are omitted."""
+    gids = list(dict.fromkeys(gid))
+    if len(gids) > BATCH_MAX_GIDS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_GIDS} gids per batch")
+
+    db.execute(_DETAIL_SELECT + " WHERE g.gid = ANY(%s)", (gids,))
+    return {item.gid: item for item in _rows_to_galleries(db, db.fetchall())}
+
+
+# Transient profile for seed galleries and/or explicit tags, same formula as
+# REBUILD_PROFILE_SQL in bench/force_rebuild.py (RebuildUserProfile):
+#   idf * type_weight * (1 + ln(tf)), L2-normalized by the caller.
+_SEED_PROFILE_SQL = """
+    WITH tf AS (
+        SELECT ns, tag, SUM(cnt)::INT AS cnt
+        FROM (
+            SELECT t.ns, tag_value AS tag, 1 AS cnt
+            FROM eh_galleries g,
+                 jsonb_each(g.tags) AS t(ns, vals),
+                 jsonb_array_elements_text(vals) AS tag_value
+            WHERE g.gid = ANY(%(gids)s)
+            UNION ALL
+            SELECT split_part(x, ':', 1), substr(x, strpos(x, ':') + 1), 1
+            FROM unnest(%(tags)s::text[]) AS x
+        ) src
+        GROUP BY ns, tag
+    )
+    SELECT v.dim, v.idf * v.type_weight * (1.0 + LN(tf.cnt::float))
+    FROM tf
+    JOIN tag_vocabulary v
+      ON v.namespace = tf.ns AND v.tag = tf.tag AND v.is_active = TRUE
+"""
+
+RECOMMEND_MAX_SEEDS = 50
+
+
+@router.get("/recommend", response_model=List[Gallery])
+def recommend_from_seeds(
+    seed: Optional[List[int]] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+    k: int = Query(50, ge=1, le=200),
+    db = Depends(get_db),
+):
+    """Ad-hoc recommendations from a handful of seed gids and/or tags.
+
+    Builds a transient TF-IDF profile and retrieves the top k from the
+    in-memory posting-list index (tag_index) instead of scanning every
+    embedding. `similarity` is the cosine to the transient profile; seeds
+    and blacklisted galleries are excluded.
+    """
+    seeds = list(dict.fromkeys(seed or []))
+    tags = [f"{ns}:{val}" for ns, val in filter(None, (_parse_tag(t) for t in tag or []))]
+    if not seeds and not tags:
+        raise HTTPException(status_code=422, detail="Provide at least one seed gid or tag")
+    if len(seeds) > RECOMMEND_MAX_SEEDS:
+        raise HTTPException(status_code=422, detail=f"At most {RECOMMEND_MAX_SEEDS} seed gids")
+
+    db.execute(_SEED_PROFILE_SQL, {"gids": seeds, "tags": tags})
+    weights = {dim: float(val) for dim, val in db.fetchall()}
+    norm = math.sqrt(sum(v * v for v in weights.values()))
+    if not norm:
+        return []
+
+    try:
+        index = tag_index.get_index()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    # Over-fetch so the blacklist filter below can't leave the page short.
+    hits = index.top_k({dim: v / norm for dim, v in weights.items()}, k * 2, exclude_gids=seeds)
+    if not hits:
+        return []
+    scores = dict(hits)
+
+    # The index is only rebuilt periodically, so re-check visibility the way
+    # the list endpoints do: removed or superseded galleries drop out here.
+    where_parts, params = _build_where(None, None, None, None, None)
+    where_parts += ["g.is_active = TRUE", "g.parent_gid IS NULL"]
+    db.execute(
+        _DETAIL_SELECT + " WHERE g.gid = ANY(%s) AND " + " AND ".join(where_parts),
+        [list(scores), *params],
+    )
+    items = _rows_to_galleries(db, db.fetchall())
+    for item in items:
+        item.similarity = scores[item.gid]
+    items.sort(key=lambda g: (-g.similarity, -g.gid))
+    return items[:k]
+
+
 @router.get("/{gid}", response_model=Gallery)
 def get_gallery(gid: int, db = Depends(get_db)):
+    db.execute(_DETAIL_SELECT + " WHERE g.gid = %s", (gid,))
+    row = db.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Gallery not found")
+
+    col_names = [desc[0] for desc in db.description]
+    item = dict(zip(col_names, row))
+    return Gallery(**item)
+
+
+# HNSW candidates fetched per requested neighbour. Visibility filters and the
+# same-group exclusion run after the index scan, so over-fetch to still fill k.
+SIMILAR_OVERFETCH = 4
+SIMILAR_MIN_EF_SEARCH = 100
+
+
+@router.get("/{gid}/similar", response_model=List[Gallery])
+def get_similar_galleries(
+    gid: int,
+    k: int = Query(20, ge=1, le=100),
+    db = Depends(get_db),
+):
+    """Nearest neighbours of a gallery by cosine over tag embeddings.
+
+    Served by the HNSW index from migrations/011_embedding_hnsw.sql; the
+    ORDER BY compares against a scalar subquery so the planner can use it.
+    `similarity` in the response is the neighbour cosine, not the profile
+    score. Other versions of the same work (same group) are excluded.
+    """
+    db.execute("SELECT tag_embedding IS NOT NULL FROM recommended_cache WHERE gid = %s", (gid,))
+    row = db.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Gallery not found")
+    if not row[0]:
+        return []
+
+    fetch = k * SIMILAR_OVERFETCH
+    db.execute("SET LOCAL hnsw.ef_search = %s", (max(SIMILAR_MIN_EF_SEARCH, fetch),))
     db.execute(
         """
-        SELECT g.*, rc.similarity,
+        WITH nn AS MATERIALIZED (
+            SELECT rc.gid,
+                   rc.tag_embedding <=> (SELECT tag_embedding FROM recommended_cache WHERE gid = %(gid)s) AS distance
+            FROM recommended_cache rc
+            ORDER BY rc.tag_embedding <=> (SELECT tag_embedding FROM recommended_cache WHERE gid = %(gid)s)
+            LIMIT %(fetch)s
+        )
+        SELECT g.*,
+               (1 - nn.distance) AS similarity,
                (f.gid IS NOT NULL) AS is_favorited, f.favorited_at,
                ggm.group_id,
                COALESCE(gc.cnt, 0) AS group_count
-        FROM eh_galleries g
-        LEFT JOIN recommended_cache rc ON rc.gid = g.gid
+        FROM nn
+        JOIN eh_galleries g ON g.gid = nn.gid
         LEFT JOIN user_favorites f ON g.gid = f.gid
         LEFT JOIN gallery_group_members ggm ON g.gid = ggm.gid
-        LEFT JOIN (
-            SELECT ggmc.group_id, COUNT(*) AS cnt
+        LEFT JOIN LATERAL (
+            SELECT COUNT(*) AS cnt
             FROM gallery_group_members ggmc
             JOIN eh_galleries gc2 ON gc2.gid = ggmc.gid
-            WHERE gc2.is_active = TRUE
-            GROUP BY ggmc.group_id
-        ) gc ON gc.group_id = ggm.group_id
-        WHERE g.gid = %s
+            WHERE ggmc.group_id = ggm.group_id AND gc2.is_active = TRUE
+        ) gc ON TRUE
+        WHERE nn.gid <> %(gid)s
+          AND g.is_active = TRUE
+          AND g.parent_gid IS NULL
+          AND (ggm.group_id IS NULL OR ggm.group_id IS DISTINCT FROM (
+              SELECT group_id FROM gallery_group_members WHERE gid = %(gid)s
+          ))
+        ORDER BY nn.distance, g.gid DESC
+        LIMIT %(k)s
         """,
-        (gid,),
+        {"gid": gid, "fetch": fetch, "k": k},
     )
-    row = db.fetchone()
-    if not row:
-        raise HTTPException(status_code=404, detail="Gallery not found")
-
-    col_names = [desc[0] for desc in db.description]
-    item = dict(zip(col_names, row))
-    return Gallery(**item)
+    return _rows_to_galleries(db, db.fetchall())
 
 
 @router.get("/{gid}/comments", response_model=List[GalleryComment])
@@ -2,13 +2,34 @@
 
 Provides visibility into the proxy controller state and allows manual
 triggering of node scans and switches.
+
+With several API workers only the leader runs the controller (see
+proxy_controller). Other workers serve status from the leader's shared
+snapshot and forward scan/switch requests to it; forwarded requests return
+immediately with {"forwarded": ...} instead of the result. Forwarding is
+at most once (see forward_command): it is refused with 503 when the shared
+row shows no live leader heartbeat, but a leader dying right after
+accepting can still drop the command.
 """
 
 import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from proxy_controller import state, scan_and_switch
+from proxy_controller import (
+    INSTANCE_ID,
+    MIHOMO_API,
+    _mihomo_get_topology,
+    clients,
+    forward_command,
+    leader,
+    live_leader,
+    read_shared_state,
+    scan_and_switch,
+    state,
+    switch_node,
+)
 
 router = APIRouter(prefix="/v1/admin/proxy", tags=["proxy"])
 
@@ -18,14 +39,39 @@ class SwitchRequest(BaseModel):
 
 
 @router.get("/status")
-def proxy_status():
-    """Return the current proxy controller state."""
-    return state.snapshot()
+async def proxy_status():
+    """Return the current proxy controller state, including the mihomo
+    topology (refreshed here when older than TOPOLOGY_TTL_SEC). Non-leader
+    workers return the leader's published snapshot."""
+    if MIHOMO_API and not leader.is_leader:
+        shared = await run_in_threadpool(read_shared_state)
+        if shared is not None:
+            return shared
+
+    if MIHOMO_API:
+        try:
+            await _mihomo_get_topology(clients.mihomo)
+        except Exception:
+            pass  # serve the last known topology
+    snapshot = state.snapshot()
+    snapshot["leader"] = {"instance": INSTANCE_ID, "is_self": True} if leader.is_leader else None
+    return snapshot
+
+
+async def _forward(command: dict) -> dict:
+    shared = await run_in_threadpool(read_shared_state)
+    to = live_leader(shared)
+    if to is None:
+        raise HTTPException(status_code=503, detail="no live proxy controller leader to forward to")
+    await run_in_threadpool(forward_command, command)
+    return {"forwarded": command["action"], "from": INSTANCE_ID, "to": to}
 
 
 @router.post("/scan")
 async def proxy_scan():
     """Manually trigger a node scan and switch."""
+    if MIHOMO_API and not leader.is_leader:
+        return await _forward({"action": "scan"})
     result = await scan_and_switch()
     return result
 
@@ -33,19 +79,12 @@ async def proxy_scan():
 @router.post("/switch")
 async def proxy_switch(req: SwitchRequest):
     """Manually switch the SELECT group to a specific node."""
-    from proxy_controller import MIHOMO_API, _mihomo_switch, _mihomo_get_current
-    import httpx
-
     if not MIHOMO_API:
         raise HTTPException(status_code=503, detail="MIHOMO_API not configured")
+    if not leader.is_leader:
+        return await _forward({"action": "switch", "node": req.node})
 
     try:
-        async with httpx.AsyncClient() as client:
-            await _mihomo_switch(client, req.node)
-            state.current_node = await _mihomo_get_current(client)
-            state.last_switched_to = req.node
-            state.last_scan_result = "manual_switch"
+        return await switch_node(req.node)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"mihomo API error: {e}")
-
-    return {"switched_to": req.node, "current_node": state.current_node}
@@ -0,0 +1,66 @@
+"""In-process cache of app_settings, kept fresh by LISTEN/NOTIFY.
+
+The app_settings trigger (migrations/013_app_settings_notify.sql) sends
+NOTIFY app_settings_changed with the key on every insert/update/delete, so
+any writer — this API, another worker process, the Go scraper, psql —
+invalidates every API process's copy. The table is a handful of rows; a
+notification reloads the whole table.
+
+While the listener is disconnected (notifications may be missed) get()
+falls back to reading the table through the caller's cursor.
+"""
+
+import logging
+import threading
+
+from pg_listener import listener
+
+logger = logging.getLogger("settings_cache")
+
+CHANNEL = "app_settings_changed"
+
+_values: dict[str, object] = {}
+_loaded = False
+_lock = threading.Lock()
+
+
+def _reload(conn) -> None:
+    global _values, _loaded
+    with conn.cursor() as cur:
+        cur.execute("SELECT key, value FROM app_settings")
+        values = dict(cur.fetchall())
+    with _lock:
+        _values = values
+        _loaded = True
+
+
+def _on_notify(conn, payload: str) -> None:
+    _reload(conn)
+
+
+listener.subscribe(CHANNEL, _on_notify, on_connect=_reload)
+
+
+def is_fresh() -> bool:
+    return _loaded and listener.connected
+
+
+def get(key: str, db=None, default=None):
+    """Setting value (decoded JSONB). Served from memory while the listener
+    is live; otherwise read through `db` when given."""
+    if is_fresh():
+        with _lock:
+            return _values.get(key, default)
+    if db is None:
+        return default
+    db.execute("SELECT value FROM app_settings WHERE key = %s", (key,))
+    row = db.fetchone()
+    return row[0] if row else default
+
+
+def set_local(key: str, value) -> None:
+    """Apply a write made by this process immediately, ahead of its own
+    notification, so the next request here reads it back."""
+    with _lock:
+        if _loaded:
+            _values[key] = value
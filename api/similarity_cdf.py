@@ -0,0 +1,94 @@
+"""In-memory CDF of recommended_cache.similarity for the admin threshold UI.
+
+Holds every non-NULL similarity as a sorted array, so the distribution
+histogram and count_above(t) are binary searches instead of three scans of
+recommended_cache per slider move.
+
+recommended_cache writes that touch similarity send NOTIFY
+similarity_changed (statement-level trigger, migrations/014). A
+notification only marks the array dirty; it is rebuilt on the next read,
+and at most once per MIN_REBUILD_INTERVAL_SEC, so a recompute that commits
+in many batches costs one rebuild rather than one per batch. While the
+listener is disconnected, the array is treated as stale after
+FALLBACK_TTL_SEC.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from pg_listener import listener
+
+CHANNEL = "similarity_changed"
+MIN_REBUILD_INTERVAL_SEC = 5.0
+FALLBACK_TTL_SEC = 60.0
+
+
+class SimilarityCDF:
+    def __init__(self, values: np.ndarray):
+        # float64 so comparisons against a threshold match Postgres, which
+        # promotes the REAL column to double precision.
+        self.values = np.sort(values.astype(np.float64))
+        self.built_at = time.time()
+
+    @property
+    def total(self) -> int:
+        return len(self.values)
+
+    def count_above(self, threshold: float) -> int:
+        """Rows with similarity >= threshold."""
+        return int(self.total - np.searchsorted(self.values, threshold, side="left"))
+
+    def histogram(self, buckets: int) -> list[dict]:
+        """Same buckets as the previous width_bucket query: [lo, hi] clamped
+        to [0, 1], lower edges inclusive, values below 0 dropped."""
+        if not self.total:
+            return []
+        lo = max(0.0, min(1.0, float(self.values[0])))
+        hi = max(lo, min(1.0, float(self.values[-1])))
+        bucket_width = (hi - lo) / buckets if hi > lo else 1.0
+        edges = lo + (hi + 1e-6 - lo) * np.arange(buckets + 1) / buckets
+        counts = np.diff(np.searchsorted(self.values, edges, side="left"))
+        return [
+            {
+                "min": round(lo + i * bucket_width, 4),
+                "max": round(lo + (i + 1) * bucket_width, 4),
+                "count": int(counts[i]),
+            }
+            for i in range(buckets)
+        ]
+
+
+_cdf: SimilarityCDF | None = None
+_dirty = True
+_lock = threading.Lock()
+
+
+def _mark_dirty(*_args) -> None:
+    global _dirty
+    _dirty = True
+
+
+listener.subscribe(CHANNEL, _mark_dirty, on_connect=_mark_dirty)
+
+
+def _is_stale(now: float) -> bool:
+    if _cdf is None:
+        return True
+    age = now - _cdf.built_at
+    if not listener.connected:
+        return age >= FALLBACK_TTL_SEC
+    return _dirty and age >= MIN_REBUILD_INTERVAL_SEC
+
+
+def get(db) -> SimilarityCDF:
+    """Current CDF, rebuilt through `db` when stale."""
+    global _cdf, _dirty
+    with _lock:
+        if _is_stale(time.time()):
+            _dirty = False
+            db.execute("SELECT similarity FROM recommended_cache WHERE similarity IS NOT NULL")
+            values = np.fromiter((r[0] for r in db.fetchall()), dtype=np.float64)
+            _cdf = SimilarityCDF(values)
+        return _cdf
@@ -0,0 +1,290 @@
+"""Vectorized recompute of recommended_cache.similarity.
+
+Replaces the single
+    UPDATE recommended_cache SET similarity = 1 - (tag_embedding <=> profile)
+statement (which rewrites every row in one transaction and bloats the table
+on the Pi) with four stages:
+
+  load     stream gid, tag_embedding, similarity through a server-side cursor
+           into CSR arrays (sparsevec text -> indices/values)
+  compute  one sparse mat-vec X @ p, divided by the row and profile norms
+  diff     keep only rows whose stored REAL value actually changes
+  write    COPY changed rows into a temp stage table and UPDATE ... FROM it,
+           one transaction per batch
+
+Rows whose embedding was cleared keep a stale similarity until the final
+orphan sweep, same as RecomputeAllScores in scraper-go/db/embeddings.go.
+
+A session-level advisory lock keeps recomputes from overlapping across API
+processes and the CLI. The Go worker's RecomputeAllScores does not take it.
+
+CLI:    python similarity_engine.py [--dsn postgresql://...] [--batch-size N] [--dry-run]
+Admin:  POST /v1/admin/recommended/recompute
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+EMBEDDING_DIM = 65536
+STREAM_ITERSIZE = 10000
+DEFAULT_BATCH_SIZE = 5000
+
+# similarity is stored as REAL; differences below this are float noise
+# between pgvector's and NumPy's arithmetic, not real changes.
+CHANGE_EPSILON = 1e-6
+
+COPY_NULL = "\\N"
+
+CLEAR_ORPHAN_SCORES_SQL = """
+UPDATE recommended_cache
+SET similarity = NULL, updated_at = NOW()
+WHERE tag_embedding IS NULL AND similarity IS NOT NULL
+"""
+
+LOCK_NAME = "similarity_recompute"
+
+
+class RecomputeBusy(RuntimeError):
+    """Another recompute is already running (in any process)."""
+
+
+def _try_lock(conn) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (LOCK_NAME,))
+        locked = cur.fetchone()[0]
+    conn.commit()
+    return locked
+
+
+def _unlock(conn) -> None:
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (LOCK_NAME,))
+    conn.commit()
+
+
+def parse_sparsevec(text: str) -> tuple[np.ndarray, np.ndarray]:
+    """Parse pgvector sparsevec text '{1:0.5,7:0.25}/65536' into 0-based
+    int32 indices and float64 values, without per-element Python objects."""
+    body = text[1:text.rindex("}")]
+    if not body:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+    # Dims (<= 65536) are exact in float64, so one numeric parse covers both.
+    flat = np.fromstring(body.replace(":", ","), sep=",")
+    return flat[0::2].astype(np.int32) - 1, flat[1::2]
+
+
+def format_sparsevec(vector: np.ndarray) -> str | None:
+    """Dense vector -> pgvector sparsevec text (1-based), None if all zero."""
+    nonzero = np.flatnonzero(vector)
+    if not len(nonzero):
+        return None
+    body = ",".join(f"{i + 1}:{float(vector[i])!r}" for i in nonzero)
+    return f"{{{body}}}/{len(vector)}"
+
+
+def load_profile(cur) -> np.ndarray | None:
+    """Dense user_profile vector, or None when no profile has been built."""
+    cur.execute("SELECT embedding::text FROM user_profile WHERE id = 1")
+    row = cur.fetchone()
+    if not row or row[0] is None:
+        return None
+    indices, values = parse_sparsevec(row[0])
+    profile = np.zeros(EMBEDDING_DIM, dtype=np.float64)
+    profile[indices] = values
+    return profile
+
+
+def load_embeddings(conn, listed_only: bool = False) -> tuple[np.ndarray, sparse.csr_matrix, np.ndarray]:
+    """Stream every embedded gallery into (gids, CSR matrix, stored similarity).
+
+    Stored NULL similarities come back as NaN. With listed_only, only galleries
+    the listings can show (active, not replaced by a newer version) are loaded.
+
+    Rows are packed into NumPy arrays one STREAM_ITERSIZE chunk at a time and
+    the chunks concatenated once at the end, so peak memory stays near twice
+    the final CSR arrays instead of boxed Python ints and floats per entry.
+    """
+    gid_chunks: list[np.ndarray] = []
+    old_chunks: list[np.ndarray] = []
+    nnz_chunks: list[np.ndarray] = []
+    index_chunks: list[np.ndarray] = []
+    value_chunks: list[np.ndarray] = []
+
+    with conn.cursor(name="similarity_engine_stream") as cur:
+        query = """
+            SELECT rc.gid, rc.tag_embedding::text, rc.similarity
+            FROM recommended_cache rc
+            WHERE rc.tag_embedding IS NOT NULL
+        """
+        if listed_only:
+            query += """
+              AND EXISTS (
+                  SELECT 1 FROM eh_galleries g
+                  WHERE g.gid = rc.gid AND g.is_active = TRUE AND g.parent_gid IS NULL
+              )
+            """
+        cur.execute(query)
+        while rows := cur.fetchmany(STREAM_ITERSIZE):
+            parsed = [parse_sparsevec(vec) for _, vec, _ in rows]
+            gid_chunks.append(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)))
+            old_chunks.append(np.fromiter(
+                (np.nan if r[2] is None else r[2] for r in rows), dtype=np.float32, count=len(rows),
+            ))
+            nnz_chunks.append(np.fromiter((len(idx) for idx, _ in parsed), dtype=np.int64, count=len(rows)))
+            index_chunks.append(np.concatenate([idx for idx, _ in parsed]))
+            value_chunks.append(np.concatenate([vals for _, vals in parsed]))
+
+    def join(chunks: list[np.ndarray], dtype) -> np.ndarray:
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+    gids = join(gid_chunks, np.int64)
+    indptr = np.zeros(len(gids) + 1, dtype=np.int64)
+    np.cumsum(join(nnz_chunks, np.int64), out=indptr[1:])
+    matrix = sparse.csr_matrix(
+        (join(value_chunks, np.float64), join(index_chunks, np.int32), indptr),
+        shape=(len(gids), EMBEDDING_DIM),
+    )
+    return gids, matrix, join(old_chunks, np.float32)
+
+
+def cosine_scores(matrix: sparse.csr_matrix, profile: np.ndarray | None) -> np.ndarray:
+    """cos(row, profile) for every row; NaN where either side is a zero vector
+    (pgvector yields NaN there, which the SQL path stores as NULL)."""
+    if profile is None:
+        return np.full(matrix.shape[0], np.nan, dtype=np.float32)
+    dots = matrix @ profile
+    row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    profile_norm = np.linalg.norm(profile)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = dots / (row_norms * profile_norm)
+    scores[~np.isfinite(scores)] = np.nan
+    return scores.astype(np.float32)
+
+
+def changed_mask(new: np.ndarray, old: np.ndarray) -> np.ndarray:
+    both_null = np.isnan(new) & np.isnan(old)
+    one_null = np.isnan(new) ^ np.isnan(old)
+    with np.errstate(invalid="ignore"):
+        moved = np.abs(new - old) > CHANGE_EPSILON
+    return one_null | (moved & ~both_null)
+
+
+def write_scores(conn, gids: np.ndarray, scores: np.ndarray, batch_size: int) -> int:
+    """COPY (gid, similarity) batches into a temp stage and apply each batch
+    in its own transaction. Returns rows updated."""
+    updated = 0
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS similarity_stage (
+                gid        BIGINT PRIMARY KEY,
+                similarity REAL
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+        for start in range(0, len(gids), batch_size):
+            buf = io.StringIO()
+            for gid, score in zip(gids[start:start + batch_size], scores[start:start + batch_size]):
+                value = COPY_NULL if np.isnan(score) else repr(float(score))
+                buf.write(f"{gid}\t{value}\n")
+            buf.seek(0)
+            cur.copy_expert("COPY similarity_stage (gid, similarity) FROM STDIN", buf)
+            cur.execute(
+                """
+                UPDATE recommended_cache rc
+                SET similarity = s.similarity, updated_at = NOW()
+                FROM similarity_stage s
+                WHERE rc.gid = s.gid
+                """
+            )
+            updated += cur.rowcount
+            conn.commit()
+    return updated
+
+
+def recompute_similarity(conn, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False) -> dict:
+    """Recompute every similarity against user_profile; write only changes.
+
+    Returns a report with row counts and per-stage milliseconds. Raises
+    RecomputeBusy if another recompute holds the advisory lock. The lock is
+    session-level, so it spans the per-batch commits on `conn`.
+    """
+    if not _try_lock(conn):
+        raise RecomputeBusy("similarity recompute already running")
+    try:
+        stages: dict[str, float] = {}
+
+        t0 = time.perf_counter()
+        with conn.cursor() as cur:
+            profile = load_profile(cur)
+        gids, matrix, old = load_embeddings(conn)
+        conn.commit()
+        stages["load_ms"] = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        scores = cosine_scores(matrix, profile)
+        stages["compute_ms"] = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        mask = changed_mask(scores, old)
+        changed_gids, changed_scores = gids[mask], scores[mask]
+        stages["diff_ms"] = (time.perf_counter() - t0) * 1000
+
+        updated = 0
+        orphans = 0
+        t0 = time.perf_counter()
+        if not dry_run:
+            updated = write_scores(conn, changed_gids, changed_scores, batch_size)
+            with conn.cursor() as cur:
+                cur.execute(CLEAR_ORPHAN_SCORES_SQL)
+                orphans = cur.rowcount
+            conn.commit()
+        stages["write_ms"] = (time.perf_counter() - t0) * 1000
+
+        return {
+            "profile_ready": profile is not None,
+            "rows": int(len(gids)),
+            "nnz": int(matrix.nnz),
+            "changed": int(mask.sum()),
+            "updated": updated,
+            "orphans_cleared": orphans,
+            "dry_run": dry_run,
+            "stages": {k: round(v, 1) for k, v in stages.items()},
+        }
+    finally:
+        _unlock(conn)
+
+
+def main() -> int:
+    import psycopg2
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--dsn", default=os.getenv("DATABASE_URL"))
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    ap.add_argument("--dry-run", action="store_true", help="compute and diff, write nothing")
+    args = ap.parse_args()
+    if not args.dsn:
+        ap.error("--dsn or DATABASE_URL is required")
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        report = recompute_similarity(conn, batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+    print(f"profile_ready={report['profile_ready']}  rows={report['rows']}  nnz={report['nnz']}")
+    print(f"changed={report['changed']}  updated={report['updated']}  orphans_cleared={report['orphans_cleared']}")
+    for stage, ms in report["stages"].items():
+        print(f"  {stage:12s} {ms:9.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""In-memory inverted index over gallery tag embeddings for ad-hoc top-k.
+
+Backs GET /v1/galleries/recommend (seed galleries / tags -> transient
+TF-IDF profile -> top-k galleries) without a cosine scan over every row.
+
+Each embedding dim is a posting list of (row, weight) sorted by row, taken
+from the CSC form of the embedding matrix, plus the dim's max weight. Query
+evaluation is term-at-a-time MaxScore:
+
+  - terms are processed in descending upper bound (query weight * max weight)
+  - while the remaining terms' bound sum can still lift an unseen gallery
+    over the current k-th best score (theta), a term's postings are added
+    in full (essential terms)
+  - after that, no new gallery can enter the top k, so the remaining
+    (non-essential) terms only score the surviving candidates by binary
+    search into their postings, and candidates that can no longer reach
+    theta are dropped
+
+Gallery embeddings are L2-normalized by the embeddings worker and query
+profiles are normalized here, so the accumulated dot product is the cosine.
+
+The index covers listed galleries only (active, not replaced). It is built in
+the background at startup and rebuilt when older than INDEX_TTL_SEC; queries
+keep using the previous index while a rebuild runs.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+import similarity_engine
+from db import connection_pool
+
+logger = logging.getLogger("tag_index")
+
+INDEX_TTL_SEC = 900
+
+
+class TagPostingIndex:
+    def __init__(self, gids: np.ndarray, matrix):
+        csc = matrix.tocsc()
+        csc.sort_indices()
+        self.gids = gids
+        self.row_of_gid = {int(g): i for i, g in enumerate(gids)}
+        self.col_ptr = csc.indptr
+        self.rows = csc.indices
+        self.weights = csc.data.astype(np.float32)
+        self.max_weight = np.zeros(csc.shape[1], dtype=np.float32)
+        nonempty = np.flatnonzero(np.diff(self.col_ptr))
+        if len(nonempty):
+            self.max_weight[nonempty] = np.maximum.reduceat(self.weights, self.col_ptr[nonempty])
+        self.built_at = time.time()
+
+    def __len__(self):
+        return len(self.gids)
+
+    def _postings(self, dim: int) -> tuple[np.ndarray, np.ndarray]:
+        lo, hi = self.col_ptr[dim], self.col_ptr[dim + 1]
+        return self.rows[lo:hi], self.weights[lo:hi]
+
+    def top_k(self, query: dict[int, float], k: int, exclude_gids=()) -> list[tuple[int, float]]:
+        """Top-k (gid, cosine) for a normalized sparse query {dim: weight}."""
+        terms = [
+            (dim, w, w * float(self.max_weight[dim]))
+            for dim, w in query.items()
+            if 0 <= dim < len(self.max_weight) and self.max_weight[dim] > 0 and w > 0
+        ]
+        if not terms or k <= 0:
+            return []
+        terms.sort(key=lambda t: t[2], reverse=True)
+
+        acc = np.zeros(len(self.gids), dtype=np.float32)
+        for gid in exclude_gids:
+            row = self.row_of_gid.get(int(gid))
+            if row is not None:
+                acc[row] = -np.inf
+
+        remaining = sum(t[2] for t in terms)
+        theta = 0.0
+        candidates = None  # sorted rows once pruning starts
+
+        for dim, w, bound in terms:
+            remaining -= bound
+            rows, weights = self._postings(dim)
+
+            if candidates is None:
+                acc[rows] += w * weights
+                if remaining < acc.max():
+                    positive = acc[acc > 0]
+                    if len(positive) >= k:
+                        theta = float(np.partition(positive, -k)[-k])
+                    if remaining < theta:
+                        candidates = np.flatnonzero(acc + remaining >= theta)
+                continue
+
+            pos = np.searchsorted(rows, candidates)
+            pos_clipped = np.minimum(pos, len(rows) - 1)
+            hit = (pos < len(rows)) & (rows[pos_clipped] == candidates)
+            acc[candidates[hit]] += w * weights[pos_clipped[hit]]
+            cand_scores = acc[candidates]
+            if len(cand_scores) >= k:
+                theta = max(theta, float(np.partition(cand_scores, -k)[-k]))
+            candidates = candidates[cand_scores + remaining >= theta]
+
+        pool = np.flatnonzero(acc > 0) if candidates is None else candidates[acc[candidates] > 0]
+        if len(pool) > k:
+            pool = pool[np.argpartition(acc[pool], -k)[-k:]]
+        order = pool[np.argsort(-acc[pool], kind="stable")]
+        return [(int(self.gids[r]), float(acc[r])) for r in order]
+
+
+_index: TagPostingIndex | None = None
+_build_lock = threading.Lock()
+
+
+def _build(blocking: bool = False) -> None:
+    global _index
+    if not _build_lock.acquire(blocking=blocking):
+        return
+    try:
+        if blocking and _index is not None:
+            return  # built by the thread we waited for
+        t0 = time.perf_counter()
+        conn = connection_pool.getconn()
+        try:
+            gids, matrix, _ = similarity_engine.load_embeddings(conn, listed_only=True)
+            conn.commit()
+        finally:
+            conn.rollback()
+            connection_pool.putconn(conn)
+        _index = TagPostingIndex(gids, matrix)
+        logger.info(
+            f"tag index built: {len(gids)} galleries, {matrix.nnz} postings "
+            f"in {(time.perf_counter() - t0) * 1000:.0f}ms"
+        )
+    except Exception as e:
+        logger.error(f"tag index build failed: {e}")
+    finally:
+        _build_lock.release()
+
+
+def warm() -> None:
+    """Build the index in a background thread (startup hook)."""
+    threading.Thread(target=_build, name="tag-index-build", daemon=True).start()
+
+
+def get_index() -> TagPostingIndex:
+    """Current index; builds synchronously on first use, refreshes stale ones
+    in the background."""
+    if _index is None:
+        _build(blocking=True)
+        if _index is None:
+            raise RuntimeError("tag index unavailable")
+    elif time.time() - _index.built_at > INDEX_TTL_SEC:
+        warm()
+    return _index
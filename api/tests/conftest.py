@@ -0,0 +1,36 @@
+"""Run the API modules without a database.
+
+db.py opens its connection pool on import, so a stand-in module is
+installed first; tests drive SQL-building code through FakeCursor.
+"""
+
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+if "db" not in sys.modules:
+    db = types.ModuleType("db")
+    db.connection_pool = None
+    db.get_cursor = None
+    db.get_db = lambda: None
+    sys.modules["db"] = db
+
+
+class FakeCursor:
+    """Records executed SQL; answers COUNT(*) with 0 and row fetches with
+    nothing. `columns` becomes cursor.description."""
+
+    def __init__(self, columns=("gid", "group_id")):
+        self.description = [(name,) for name in columns]
+        self.queries: list[tuple[str, object]] = []
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+    def fetchone(self):
+        return [0]
+
+    def fetchall(self):
+        return []
@@ -0,0 +1,52 @@
+import event_broker
+
+
+class EventsCursor:
+    """Serves fetch_after's query from an in-memory sync_task_events."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        after_id, limit = params
+        self.result = [
+            (i, 1, None, "task.progress", "", {}, None)
+            for i in self.ids if i > after_id
+        ][:limit]
+
+    def fetchall(self):
+        return self.result
+
+
+class EventsConn:
+    def __init__(self, ids):
+        self.ids = ids
+
+    def cursor(self):
+        return EventsCursor(self.ids)
+
+
+class ImmediateLoop:
+    def call_soon_threadsafe(self, fn, *args):
+        fn(*args)
+
+
+def test_reconnect_catch_up_pages_past_fetch_limit():
+    broker = event_broker.EventBroker()
+    broker._loop = ImmediateLoop()
+    broker.last_id = 100
+    sub = broker.subscribe()
+    missed = list(range(101, 101 + event_broker.FETCH_LIMIT + 200))
+
+    broker._on_connect(EventsConn(list(range(1, 101)) + missed))
+
+    received = [sub.queue.get_nowait()["id"] for _ in range(sub.queue.qsize())]
+    assert received == missed
+    assert broker.last_id == missed[-1]
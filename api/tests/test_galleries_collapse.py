@@ -0,0 +1,32 @@
+from conftest import FakeCursor
+from routers import galleries
+
+LIST_DEFAULTS = dict(
+    category=None, language=None, min_rating=None, min_fav=None, tag=None,
+    is_favorited=None, sort="gid_desc", page=1, page_size=24, format="json",
+    expand=None, collapse="group", profile=None,
+)
+
+
+def _list_query(monkeypatch, **kwargs):
+    monkeypatch.setattr(galleries, "TAG_BLACKLIST", [[("male", "yaoi")]])
+    db = FakeCursor()
+    galleries.get_galleries(db=db, **{**LIST_DEFAULTS, **kwargs})
+    return db.queries[-1][0]
+
+
+def test_unfiltered_collapse_uses_maintained_representatives(monkeypatch):
+    query = _list_query(monkeypatch)
+    assert "gallery_group_representatives" in query
+    assert "DISTINCT ON" not in query
+
+
+def test_filtered_collapse_ranks_matching_members(monkeypatch):
+    query = _list_query(monkeypatch, tag=["female:glasses"])
+    assert "DISTINCT ON" in query
+    assert "gallery_group_representatives" not in query
+
+
+def test_favorites_collapse_ranks_matching_members(monkeypatch):
+    query = _list_query(monkeypatch, is_favorited=True)
+    assert "DISTINCT ON" in query
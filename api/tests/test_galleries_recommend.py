@@ -0,0 +1,23 @@
+from conftest import FakeCursor
+from routers import galleries
+
+
+class StaticIndex:
+    def top_k(self, weights, k, exclude_gids=()):
+        return [(7, 0.9), (8, 0.8)]
+
+
+class SeedCursor(FakeCursor):
+    def fetchall(self):
+        query = self.queries[-1][0]
+        return [(1, 2.0)] if "tag_vocabulary" in query else []
+
+
+def test_recommend_hydration_rechecks_visibility(monkeypatch):
+    monkeypatch.setattr(galleries.tag_index, "get_index", lambda: StaticIndex())
+    db = SeedCursor()
+    galleries.recommend_from_seeds(seed=[1], tag=None, k=5, db=db)
+    hydrate = db.queries[-1][0]
+    assert "g.gid = ANY(%s)" in hydrate
+    assert "g.is_active = TRUE" in hydrate
+    assert "g.parent_gid IS NULL" in hydrate
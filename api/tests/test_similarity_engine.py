@@ -0,0 +1,56 @@
+import numpy as np
+
+import similarity_engine
+
+
+class StreamCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+
+class StreamConn:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, name=None):
+        return StreamCursor(self.rows)
+
+
+def test_parse_sparsevec_is_zero_based():
+    indices, values = similarity_engine.parse_sparsevec("{1:0.5,65536:0.25}/65536")
+    assert indices.tolist() == [0, 65535]
+    assert values.tolist() == [0.5, 0.25]
+    assert similarity_engine.parse_sparsevec("{}/65536")[0].size == 0
+
+
+def test_load_embeddings_across_chunks(monkeypatch):
+    monkeypatch.setattr(similarity_engine, "STREAM_ITERSIZE", 2)
+    rows = [
+        (10, "{1:1,3:2}/65536", 0.5),
+        (11, "{}/65536", None),
+        (12, "{2:4}/65536", 0.25),
+    ]
+    gids, matrix, old = similarity_engine.load_embeddings(StreamConn(rows))
+
+    assert gids.tolist() == [10, 11, 12]
+    assert matrix.indptr.tolist() == [0, 2, 2, 3]
+    assert matrix.toarray()[:, :3].tolist() == [[1, 0, 2], [0, 0, 0], [0, 4, 0]]
+    assert old[0] == np.float32(0.5) and np.isnan(old[1])
+
+
+def test_load_embeddings_empty():
+    gids, matrix, old = similarity_engine.load_embeddings(StreamConn([]))
+    assert gids.size == 0 and matrix.shape == (0, similarity_engine.EMBEDDING_DIM) and old.size == 0
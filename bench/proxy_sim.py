@@ -0,0 +1,462 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "httpx[http2]",
+#   "psycopg2-binary",
+#   "python-dotenv",
+#   "starlette",
+# ]
+# ///
+"""
+Offline simulation of the proxy controller's ban -> scan -> switch loop.
+
+Runs the real api/proxy_controller.py against local stand-ins:
+
+  mihomo   REST API: GET /proxies, GET/PUT /proxies/SELECT and
+           GET /proxies/{name}/delay over a synthetic node set
+  proxy    HTTP proxy on the "mixed" port; routes each request through the
+           node SELECT currently points at
+  listeners  optional per-node proxy ports (PROXY_NODE_LISTENERS)
+  EX       stand-in for EX_BASE_URL; answers per node as ok, banned, slow
+           (ok after a delay) or down (never answers)
+
+Each storm assigns behaviours to the nodes (seeded), lets the current node be
+healthy for --calm seconds (time for the standby prober, if enabled), then
+bans the current node plus a --collateral share of the healthy ones and
+calls scan_and_switch(), the same call the worker makes on a ban event.
+Recorded per storm:
+
+  time-to-recovery   ban -> SELECT settles on a node that is actually ok
+  scan duration      scan_and_switch() wall time
+  flips              SELECT changes during the scan (each one reroutes the
+                     scraper's traffic)
+  EX requests        probe requests that reached the EX stand-in
+  loop lag           how late a 10 ms timer fires on the shared event loop;
+                     a blocking call anywhere in the controller shows up here
+
+The same storm sequence is replayed for every --modes entry, so strategies
+are compared on identical worlds.
+
+By default the sim needs no database: api/db.py (which connects at import
+time) is replaced by an in-memory stand-in whose pool refuses connections,
+and nothing the sim drives touches it. With --pg the real db module is used
+instead; --record-probes (which writes to proxy_node_probes, use a scratch
+database) requires it.
+
+Usage:
+    uv run bench/proxy_sim.py
+    uv run bench/proxy_sim.py --nodes 16 --storms 20 --modes serial,parallel --listeners 4
+    uv run bench/proxy_sim.py --standby 3 --calm 3 --json sim.json
+    uv run bench/proxy_sim.py --pg postgresql://... --record-probes
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import types
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+
+OK_PAGE = b"<html><body><div class='itg'>" + b"<div class='gl1t'>gallery</div>" * 20 + b"</div></body></html>"
+BANNED_PAGE = b"Your IP address has been temporarily banned for excessive pageloads."
+SAD_PANDA = b""
+
+
+class OfflinePool:
+    """connection_pool stand-in for runs without --pg."""
+
+    def getconn(self):
+        raise RuntimeError("proxy sim runs without a database; pass --pg")
+
+    def putconn(self, conn):
+        pass
+
+
+def install_offline_db() -> None:
+    """Put an in-memory db module in sys.modules before the controller
+    imports it, so api/db.py never opens its pool."""
+    db = types.ModuleType("db")
+    db.connection_pool = OfflinePool()
+    db.get_cursor = None
+    db.get_db = None
+    sys.modules["db"] = db
+
+
+# ── Minimal HTTP/1.1 server ─────────────────────────────────────────────────
+
+
+class MiniHTTP:
+    """One request per connection, always answered with Connection: close.
+
+    handler(method, target, headers, body) -> (status, content_type, body)
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.server: asyncio.base_events.Server | None = None
+        self.port = 0
+
+    async def start(self) -> "MiniHTTP":
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _serve(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    k, v = line.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+            length = int(headers.get("content-length", "0"))
+            body = await reader.readexactly(length) if length else b""
+            status, ctype, payload = await self.handler(method, target, headers, body)
+            writer.write(
+                f"HTTP/1.1 {status} X\r\nContent-Type: {ctype}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self) -> None:
+        self.server.close()
+
+
+def _json(status: int, obj) -> tuple[int, str, bytes]:
+    return status, "application/json", json.dumps(obj).encode()
+
+
+# ── Simulated world ─────────────────────────────────────────────────────────
+
+
+class World:
+    """Node behaviours plus the mihomo SELECT state they are reached through."""
+
+    BEHAVIOURS = ("ok", "banned", "slow", "down")
+
+    def __init__(self, nodes: int, slow_ms: int):
+        self.nodes = [f"SIM-{i:02d}" for i in range(nodes)]
+        self.behaviour = {n: "ok" for n in self.nodes}
+        self.latency_ms = {n: 100 for n in self.nodes}
+        self.slow_ms = slow_ms
+        self.select_now = self.nodes[0]
+        self.flips: list[tuple[float, str]] = []
+        self.ex_requests = 0
+
+    def assign(self, rng: random.Random, banned: float, slow: float, down: float) -> None:
+        for n in self.nodes:
+            r = rng.random()
+            self.behaviour[n] = (
+                "banned" if r < banned
+                else "slow" if r < banned + slow
+                else "down" if r < banned + slow + down
+                else "ok"
+            )
+            self.latency_ms[n] = rng.randint(40, 400)
+        self.behaviour[self.select_now] = "ok"
+
+    def ban(self, rng: random.Random, collateral: float) -> None:
+        self.behaviour[self.select_now] = "banned"
+        for n in self.nodes:
+            if self.behaviour[n] == "ok" and rng.random() < collateral:
+                self.behaviour[n] = "banned"
+
+    def select(self, node: str) -> None:
+        if node != self.select_now:
+            self.select_now = node
+            self.flips.append((time.perf_counter(), node))
+
+    async def delay(self, node: str) -> None:
+        b = self.behaviour[node]
+        if b == "down":
+            await asyncio.sleep(3600)
+        await asyncio.sleep((self.slow_ms if b == "slow" else self.latency_ms[node]) / 1000)
+
+
+def mihomo_handler(world: World):
+    def group(node):
+        return {"type": "URLTest", "now": f"{node}-leaf", "all": [f"{node}-leaf"]}
+
+    async def handle(method, target, headers, body):
+        parts = urlsplit(target)
+        path = unquote(parts.path)
+        if method == "GET" and path == "/proxies":
+            proxies = {"SELECT": {"type": "Selector", "now": world.select_now, "all": world.nodes + ["DIRECT"]}}
+            for n in world.nodes:
+                proxies[n] = group(n)
+                proxies[f"{n}-leaf"] = {"type": "Shadowsocks"}
+            proxies["DIRECT"] = {"type": "Direct"}
+            return _json(200, {"proxies": proxies})
+        if path == "/proxies/SELECT":
+            if method == "PUT":
+                world.select(json.loads(body)["name"])
+                return 204, "application/json", b""
+            return _json(200, {"type": "Selector", "now": world.select_now, "all": world.nodes + ["DIRECT"]})
+        if method == "GET" and path.startswith("/proxies/") and path.endswith("/delay"):
+            node = path[len("/proxies/"):-len("/delay")]
+            timeout_ms = int(dict(p.split("=", 1) for p in parts.query.split("&") if "=" in p).get("timeout", "5000"))
+            if node not in world.behaviour:
+                return _json(404, {"message": "resource not found"})
+            t0 = time.perf_counter()
+            try:
+                await asyncio.wait_for(world.delay(node), timeout_ms / 1000)
+            except asyncio.TimeoutError:
+                return _json(504, {"message": "Timeout"})
+            return _json(200, {"delay": round((time.perf_counter() - t0) * 1000)})
+        return _json(404, {"message": "resource not found"})
+
+    return handle
+
+
+def proxy_handler(world: World, forward: httpx.AsyncClient, timeout: float, node: str | None = None):
+    """Proxy port: `node` fixed for a per-node listener, else SELECT's."""
+
+    async def handle(method, target, headers, body):
+        via = node or world.select_now
+        try:
+            resp = await forward.request(
+                method,
+                target,
+                headers={"x-sim-node": via, "cookie": headers.get("cookie", "")},
+                timeout=timeout,
+            )
+        except httpx.TimeoutException:
+            return 504, "text/plain", b"upstream timeout"
+        return resp.status_code, resp.headers.get("content-type", "text/html"), resp.content
+
+    return handle
+
+
+def ex_handler(world: World):
+    async def handle(method, target, headers, body):
+        node = headers.get("x-sim-node", "")
+        world.ex_requests += 1
+        if node not in world.behaviour:
+            return 502, "text/plain", b"unknown node"
+        b = world.behaviour[node]
+        await world.delay(node)
+        if "ipb_member_id" not in headers.get("cookie", ""):
+            return 200, "text/html", SAD_PANDA
+        return 200, "text/html", BANNED_PAGE if b == "banned" else OK_PAGE
+
+    return handle
+
+
+# ── Measurement ─────────────────────────────────────────────────────────────
+
+
+class LoopLagMonitor:
+    """Samples how late a short timer fires on the running event loop."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (time.perf_counter() - t0 - self.interval) * 1000))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+def pct(values: list[float], q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def settled_recovery(world: World, banned_at: float, switched_to) -> float | None:
+    """Seconds from the ban to the last SELECT flip, if it landed on an ok node."""
+    if not switched_to or world.behaviour.get(world.select_now) != "ok":
+        return None
+    flips = [t for t, _ in world.flips if t >= banned_at]
+    return (flips[-1] - banned_at) if flips else None
+
+
+async def run_mode(pc, mode: str, world: World, args) -> dict:
+    pc.PROBE_MODE = mode
+    pc.state = pc.ProxyState()
+    rng = random.Random(args.seed)
+    lag = LoopLagMonitor()
+    standby = None
+    if args.standby:
+        pc.STANDBY_NODES = args.standby
+        pc.STANDBY_BUDGET_PER_HOUR = args.standby_budget
+        standby = asyncio.create_task(pc._standby_loop())
+
+    storms = []
+    lag.start()
+    for i in range(args.storms):
+        world.assign(rng, args.banned, args.slow, args.down)
+        await asyncio.sleep(args.calm)
+        world.ban(rng, args.collateral)
+        world.flips.clear()
+        ex_before = world.ex_requests
+        banned_at = time.perf_counter()
+        result = await pc.scan_and_switch()
+        elapsed = time.perf_counter() - banned_at
+        ttr = settled_recovery(world, banned_at, result.get("switched_to"))
+        healthy_left = sum(1 for n in world.nodes if world.behaviour[n] == "ok")
+        storms.append({
+            "storm": i,
+            "switched_to": result.get("switched_to"),
+            "error": result.get("error"),
+            "healthy_nodes": healthy_left,
+            "recovered": ttr is not None,
+            "time_to_recovery_sec": round(ttr, 3) if ttr is not None else None,
+            "scan_sec": round(elapsed, 3),
+            "flips": len(world.flips),
+            "ex_requests": world.ex_requests - ex_before,
+        })
+    lag.stop()
+    if standby is not None:
+        standby.cancel()
+
+    ttrs = [s["time_to_recovery_sec"] for s in storms if s["recovered"]]
+    scans = [s["scan_sec"] for s in storms]
+    recoverable = sum(1 for s in storms if s["healthy_nodes"] > 0)
+    return {
+        "mode": mode,
+        "standby": args.standby,
+        "storms": len(storms),
+        "recoverable": recoverable,
+        "recovered": len(ttrs),
+        "ttr_p50_sec": pct(ttrs, 0.5),
+        "ttr_max_sec": max(ttrs) if ttrs else None,
+        "scan_p50_sec": pct(scans, 0.5),
+        "scan_max_sec": max(scans) if scans else None,
+        "flips_avg": statistics.mean(s["flips"] for s in storms) if storms else 0,
+        "ex_requests_avg": statistics.mean(s["ex_requests"] for s in storms) if storms else 0,
+        "loop_lag_p99_ms": pct(lag.samples, 0.99),
+        "loop_lag_max_ms": max(lag.samples) if lag.samples else None,
+        "detail": storms,
+    }
+
+
+def fmt(v, unit="", spec=".2f"):
+    return "-" if v is None else f"{v:{spec}}{unit}"
+
+
+async def main_async(args) -> int:
+    world = World(args.nodes, args.slow_ms)
+    forward = httpx.AsyncClient()
+    mihomo = await MiniHTTP(mihomo_handler(world)).start()
+    ex = await MiniHTTP(ex_handler(world)).start()
+    upstream_timeout = args.probe_timeout + 1
+    proxy = await MiniHTTP(proxy_handler(world, forward, upstream_timeout)).start()
+    listeners = {}
+    for node in world.nodes[: args.listeners]:
+        listeners[node] = await MiniHTTP(proxy_handler(world, forward, upstream_timeout, node)).start()
+
+    if args.pg:
+        os.environ["DATABASE_URL"] = args.pg
+    else:
+        install_offline_db()
+    os.environ.update({
+        "MIHOMO_API": mihomo.url,
+        "PROXY_URL": proxy.url,
+        "EX_BASE_URL": ex.url + "/",
+        "EX_COOKIES": "ipb_member_id=1; ipb_pass_hash=sim",
+        "PROXY_NODE_LISTENERS": ",".join(f"{n}={s.url}" for n, s in listeners.items()),
+    })
+    sys.path.insert(0, str(API_DIR))
+    import proxy_controller as pc
+
+    pc.PROBE_TIMEOUT_SEC = args.probe_timeout
+    pc.DELAY_TIMEOUT_MS = int(args.probe_timeout * 1000)
+    if not args.record_probes:
+        async def _no_record(results):
+            pass
+        pc._update_node_health = _no_record
+    pc.leader.is_leader = True  # the sim plays the elected leader
+    pc.clients.open()
+
+    print(
+        f"== proxy sim: nodes={args.nodes} listeners={len(listeners)} storms={args.storms} "
+        f"banned={args.banned} slow={args.slow} down={args.down} collateral={args.collateral} "
+        f"standby={args.standby} seed={args.seed} =="
+    )
+    reports = []
+    try:
+        for mode in args.modes.split(","):
+            report = await run_mode(pc, mode.strip(), world, args)
+            reports.append(report)
+            print(
+                f"  {report['mode']:9s} recovered={report['recovered']}/{report['recoverable']}"
+                f"  ttr p50={fmt(report['ttr_p50_sec'], 's')} max={fmt(report['ttr_max_sec'], 's')}"
+                f"  scan p50={fmt(report['scan_p50_sec'], 's')} max={fmt(report['scan_max_sec'], 's')}"
+                f"  flips={report['flips_avg']:.1f}  ex_req={report['ex_requests_avg']:.1f}"
+                f"  loop_lag p99={fmt(report['loop_lag_p99_ms'], 'ms', '.1f')}"
+                f" max={fmt(report['loop_lag_max_ms'], 'ms', '.1f')}"
+            )
+    finally:
+        await pc.clients.aclose()
+        await forward.aclose()
+        for server in (mihomo, ex, proxy, *listeners.values()):
+            await server.stop()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "modes": reports}, indent=2))
+        print(f"wrote {args.json}")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pg", help="use a real database (needed for --record-probes)")
+    ap.add_argument("--nodes", type=int, default=12)
+    ap.add_argument("--listeners", type=int, default=0, help="first N nodes get a dedicated listener")
+    ap.add_argument("--storms", type=int, default=10)
+    ap.add_argument("--modes", default="serial,parallel")
+    ap.add_argument("--banned", type=float, default=0.4, help="share of nodes banned per storm")
+    ap.add_argument("--slow", type=float, default=0.15)
+    ap.add_argument("--down", type=float, default=0.1)
+    ap.add_argument("--collateral", type=float, default=0.2,
+                    help="share of healthy nodes also banned when the storm hits")
+    ap.add_argument("--slow-ms", type=int, default=2500)
+    ap.add_argument("--probe-timeout", type=float, default=2.0,
+                    help="overrides PROBE_TIMEOUT_SEC / DELAY_TIMEOUT_MS to keep runs short")
+    ap.add_argument("--calm", type=float, default=0.0, help="seconds of healthy traffic before each ban")
+    ap.add_argument("--standby", type=int, default=0, help="run the standby prober over N nodes")
+    ap.add_argument("--standby-budget", type=int, default=7200, help="standby probes per hour")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--record-probes", action="store_true",
+                    help="write probe results to proxy_node_probes (use a scratch DB)")
+    ap.add_argument("--json", help="write the full report here")
+    args = ap.parse_args()
+    if args.record_probes and not args.pg:
+        ap.error("--record-probes needs --pg")
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -66,6 +66,10 @@ export function getSimilarityDistribution() {
   return request('/recommended/distribution');
 }
 
+export function previewThreshold(threshold) {
+  return request(`/recommended/preview?threshold=${threshold}`);
+}
+
 export function updateThreshold(threshold) {
   return request('/recommended/threshold', {
     method: 'PUT',
@@ -77,3 +81,27 @@ export function updateThreshold(threshold) {
 export function getEmbeddingsStatus() {
   return request('/recommended/embeddings-status');
 }
+
+export function getProfiles() {
+  return request('/profiles');
+}
+
+export function createProfile(data) {
+  return request('/profiles', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(data),
+  });
+}
+
+export function deleteProfile(id) {
+  return request(`/profiles/${id}`, {
+    method: 'DELETE',
+  });
+}
+
+export function rebuildProfile(id) {
+  return request(`/profiles/${id}/rebuild`, {
+    method: 'POST',
+  });
+}
@@ -1,5 +1,6 @@
 import { IS_PUBLIC } from '../shared/mode';
 import { getAllowCosplay } from '../shared/settings';
+import { decodeGalleryList } from '../shared/galleryQuery';
 
 const BASE = (import.meta.env.VITE_API_BASE_URL || '').replace(/\/$/, '');
 
@@ -29,9 +30,21 @@ function cosplayParam() {
   return IS_PUBLIC && getAllowCosplay() ? 1 : undefined;
 }
 
+// Self-hosted API lists use the compact columnar encoding. Callers opt into
+// collapse: 'group' and expand: 'group' (inline group members, see
+// buildGalleryRequestParams). The public worker only speaks the object
+// format without either, which decodeGalleryList passes through.
 export const fetchGalleries = async (params) => {
-  const { tags, ...rest } = params || {};
-  return getJson('/v1/galleries', { ...rest, tag: tags, allow_cosplay: cosplayParam() });
+  const { tags, expand, collapse, ...rest } = params || {};
+  const payload = await getJson('/v1/galleries', {
+    ...rest,
+    tag: tags,
+    format: IS_PUBLIC ? undefined : 'columnar',
+    expand: IS_PUBLIC ? undefined : expand,
+    collapse: IS_PUBLIC ? undefined : collapse,
+    allow_cosplay: cosplayParam(),
+  });
+  return decodeGalleryList(payload);
 };
 
 export const fetchGalleryGroup = async (groupId) =>
@@ -46,3 +59,15 @@ export const fetchGallery = async (gid) =>
 
 export const fetchGalleryComments = async (gid, limit = 200) =>
   getJson(`/v1/galleries/${gid}/comments`, { limit });
+
+// Resolves many galleries in one round-trip; returns { [gid]: gallery } and
+// omits gids the server doesn't know.
+export const fetchGalleriesBatch = async (gids) =>
+  getJson('/v1/galleries/batch', { gid: gids });
+
+export const fetchSimilarGalleries = async (gid, k = 20) =>
+  getJson(`/v1/galleries/${gid}/similar`, { k });
+
+// Ad-hoc recommendations from seed gids and/or "ns:value" tags.
+export const fetchSeedRecommendations = async ({ seeds, tags, k = 50 } = {}) =>
+  getJson('/v1/galleries/recommend', { seed: seeds, tag: tags, k });
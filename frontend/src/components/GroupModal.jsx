@@ -21,9 +21,24 @@ function reducer(state, action) {
   }
 }
 
-export default function GroupModal({ groupId, onClose }) {
+// Inline members are capped server-side (GROUP_EXPAND_LIMIT) while every
+// member row carries the full group_count, so fewer rows than that means
+// the list was truncated.
+function completeMembers(members) {
+  if (!members?.length) return undefined;
+  return members.length >= (members[0].group_count ?? 0) ? members : undefined;
+}
+
+// `members` is the group's gallery list when the caller already has it (list
+// pages that request expand=group); the modal fetches the group itself when
+// it is missing or truncated.
+export default function GroupModal({ groupId, members: inlineMembers, onClose }) {
   const dialogRef = useRef(null);
-  const [state, dispatch] = useReducer(reducer, initialState);
+  const members = completeMembers(inlineMembers);
+  const [state, dispatch] = useReducer(
+    reducer,
+    members ? { galleries: members, loading: false } : initialState,
+  );
   const { galleries, loading } = state;
 
   useEffect(() => {
@@ -38,11 +53,15 @@ export default function GroupModal({ groupId, onClose }) {
 
   useEffect(() => {
     if (!groupId) return;
+    if (members) {
+      dispatch({ type: 'success', galleries: members });
+      return;
+    }
     dispatch({ type: 'load' });
     fetchGalleryGroup(groupId)
       .then((galleries) => dispatch({ type: 'success', galleries }))
       .catch(() => dispatch({ type: 'error' }));
-  }, [groupId]);
+  }, [groupId, members]);
 
   return (
     <dialog
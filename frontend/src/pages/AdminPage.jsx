@@ -1,5 +1,5 @@
 import React, { useEffect, useState, useCallback, useRef, useReducer } from 'react';
-import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { useQuery, useQueryClient, keepPreviousData } from '@tanstack/react-query';
 import {
   Loader2,
   CheckCircle2,
@@ -24,6 +24,7 @@ import {
   getTasks,
   getThumbStats,
   getSimilarityDistribution,
+  previewThreshold,
   getEmbeddingsStatus,
   updateThreshold,
   startTask,
@@ -1097,6 +1098,16 @@ function SimilarityDistributionPanel() {
 
   const maxCount = Math.max(...dist.buckets.map((b) => b.count), 1);
 
+  // Exact count for the slider position, answered from the server's cached
+  // similarity CDF; the bucket interpolation only fills in until it arrives.
+  const { data: preview } = useQuery({
+    queryKey: ['admin', 'thresholdPreview', localThreshold],
+    queryFn: () => previewThreshold(localThreshold),
+    enabled: localThreshold != null,
+    placeholderData: keepPreviousData,
+    staleTime: 30_000,
+  });
+
   const countAbove = dist.buckets.reduce((sum, b) => {
     if (b.min >= threshold) return sum + b.count;
     if (b.min < threshold && b.max > threshold) {
@@ -1104,7 +1115,9 @@ function SimilarityDistributionPanel() {
     }
     return sum;
   }, 0);
-  const displayCount = localThreshold == null ? dist.count_above : countAbove;
+  const displayCount = localThreshold == null
+    ? dist.count_above
+    : (preview?.threshold === localThreshold ? preview.count_above : countAbove);
 
   const handleSave = async () => {
     if (localThreshold == null) return;
@@ -1327,7 +1340,7 @@ function QueuesPanel({ stats }) {
           />
           <QueueStage icon={RefreshCw} label="Pending" value={stats.pending} color="text-yellow-400" />
           <QueueStage icon={Loader2} label="Processing" value={stats.processing} color="text-blue-400" />
-          <QueueStage icon={CheckCircle2} label="Done" value={stats.done} color="text-emerald-400" />
+          <QueueStage icon={CheckCircle2} label="Done" value={stats.done + (stats.archived || 0)} color="text-emerald-400" />
         </div>
       </div>
     </div>
@@ -20,14 +20,17 @@ import {
   UserRound,
   Users,
 } from 'lucide-react';
-import { fetchGallery, fetchGalleryComments } from '../api';
+import { fetchGallery, fetchGalleryComments, fetchSimilarGalleries } from '../api';
+import GalleryCard from '../components/GalleryCard';
 import GroupModal from '../components/GroupModal';
 import TagBadge from '../components/TagBadge';
 import { CATEGORY_STYLES, FALLBACK_IMAGE, getExUrl, getThumbUrl, LINK_TARGET } from '../shared/gallery';
+import { DETAIL_STALE_MS } from '../shared/galleryQuery';
 import { t, formatDate, formatDateTime } from '../shared/i18n';
 import { IS_PUBLIC } from '../shared/mode';
 
 const NS_ORDER = ['artist', 'group', 'parody', 'character', 'female', 'male', 'language', 'misc'];
+const SIMILAR_COUNT = 12;
 
 function Metric({ icon: Icon, label, value, tone = 'text-gray-100', hint }) {
   return (
@@ -93,6 +96,9 @@ export default function GalleryDetailPage() {
     queryKey: ['gallery', gid],
     queryFn: () => fetchGallery(gid),
     enabled: Number.isFinite(gid),
+    // The list page prefetches detail records in one batch; don't refetch
+    // them on mount.
+    staleTime: DETAIL_STALE_MS,
   });
 
   const commentsQuery = useQuery({
@@ -101,6 +107,14 @@ export default function GalleryDetailPage() {
     enabled: !IS_PUBLIC && Number.isFinite(gid),
   });
 
+  // Neighbours come back fully enriched (group, favorite), so the section
+  // needs no per-gallery follow-up requests.
+  const similarQuery = useQuery({
+    queryKey: ['gallery-similar', gid],
+    queryFn: () => fetchSimilarGalleries(gid, SIMILAR_COUNT),
+    enabled: !IS_PUBLIC && Number.isFinite(gid),
+  });
+
   const gallery = galleryQuery.data;
   const displayTitle = gallery?.title_jpn || gallery?.title || t('detail.untitled');
   const secondaryTitle = gallery?.title_jpn && gallery?.title && gallery.title_jpn !== gallery.title
@@ -247,6 +261,20 @@ export default function GalleryDetailPage() {
             </section>
           )}
 
+          {!IS_PUBLIC && similarQuery.data?.length > 0 && (
+            <section className="mb-8">
+              <div className="mb-3">
+                <h2 className="text-sm font-semibold text-white">{t('detail.similar')}</h2>
+                <p className="mt-1 text-xs text-gray-600">{t('detail.similar.hint')}</p>
+              </div>
+              <div className="grid grid-cols-3 gap-3 sm:grid-cols-4 xl:grid-cols-6">
+                {similarQuery.data.map((item) => (
+                  <GalleryCard key={item.gid} gallery={item} viewMode="grid" onGroupClick={setGroupModalId} />
+                ))}
+              </div>
+            </section>
+          )}
+
           {!IS_PUBLIC && (
             <section>
               <div className="mb-3 flex items-end justify-between gap-3">
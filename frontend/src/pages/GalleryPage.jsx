@@ -1,8 +1,8 @@
 import React, { useState, useCallback, useRef, useEffect, useMemo, useReducer } from 'react';
-import { useQuery, keepPreviousData } from '@tanstack/react-query';
+import { useQuery, useQueryClient, keepPreviousData } from '@tanstack/react-query';
 import { useSearchParams } from 'react-router-dom';
 import { LayoutGrid, LayoutList, ChevronFirst, ChevronLast, ChevronLeft, ChevronRight, Loader2, AlertCircle, Heart, Star, MessageCircle, Calendar, ChevronDown, Languages, Sparkles } from 'lucide-react';
-import { fetchGalleries } from '../api';
+import { fetchGalleries, fetchGalleriesBatch } from '../api';
 import GalleryCard from '../components/GalleryCard';
 import FilterPanel from '../components/FilterPanel';
 import GroupModal from '../components/GroupModal';
@@ -258,6 +258,30 @@ const GalleryPage = ({ favoritesOnly = false, recommendedOnly = false }) => {
     placeholderData: keepPreviousData,
   });
 
+  // Warm the detail cache for the whole page with one /batch round-trip
+  // instead of one /galleries/{gid} request per opened gallery. Self-hosted
+  // only: the public worker has no batch endpoint.
+  const queryClient = useQueryClient();
+  useEffect(() => {
+    if (IS_PUBLIC || !data?.items?.length) return undefined;
+    const gids = data.items
+      .map((g) => g.gid)
+      .filter((gid) => !queryClient.getQueryState(['gallery', gid])?.dataUpdatedAt);
+    if (!gids.length) return undefined;
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      fetchGalleriesBatch(gids)
+        .then((byGid) => {
+          if (cancelled) return;
+          for (const gallery of Object.values(byGid)) {
+            queryClient.setQueryData(['gallery', gallery.gid], gallery);
+          }
+        })
+        .catch(() => { /* detail pages fall back to their own fetch */ });
+    }, 500);
+    return () => { cancelled = true; clearTimeout(timer); };
+  }, [data, queryClient]);
+
   const handleFilterChange = useCallback((newFilters) => {
     setFilters(newFilters);
     setPage(1);
@@ -420,7 +444,11 @@ const GalleryPage = ({ favoritesOnly = false, recommendedOnly = false }) => {
       <PaginationBar page={page} totalPages={totalPages || 1} onPageChange={handlePageChange} />
 
       {groupModalId && (
-        <GroupModal groupId={groupModalId} onClose={() => setGroupModalId(null)} />
+        <GroupModal
+          groupId={groupModalId}
+          members={data?.groups?.[groupModalId]}
+          onClose={() => setGroupModalId(null)}
+        />
       )}
     </div>
   );
@@ -1,10 +1,15 @@
+// Detail records the list page prefetches in one /batch request stay fresh
+// this long, so opening a gallery from the list needs no request of its own.
+export const DETAIL_STALE_MS = 5 * 60_000;
+
 export function getGalleryBaseSort(recommendedOnly) {
   return recommendedOnly ? 'recommended' : 'gid_desc';
 }
 
 // Sorting and minimum-rating are deliberately page-local UI transforms.
 // This builder is the boundary that prevents those controls from changing
-// server pagination for Gallery, Favorites, or For You.
+// server pagination for Gallery, Favorites, or For You. Every list view shows
+// group badges, so members are inlined (expand=group) for GroupModal.
 export function buildGalleryRequestParams({ filters, page, pageSize, recommendedOnly = false }) {
   const apiFilters = { ...filters };
   const { is_favorited: isFavorited, tags } = apiFilters;
@@ -18,9 +23,44 @@ export function buildGalleryRequestParams({ filters, page, pageSize, recommended
     page_size: pageSize,
     sort: getGalleryBaseSort(recommendedOnly),
     tags,
+    expand: 'group',
     ...apiFilters,
   };
   if (isFavorited) params.is_favorited = true;
   if (recommendedOnly) params.is_favorited = false;
   return params;
 }
+
+function decodeTags(indices, tagTable) {
+  if (!Array.isArray(indices)) return indices;
+  const tags = {};
+  for (const idx of indices) {
+    const key = tagTable[idx];
+    const sep = key.indexOf(':');
+    const ns = key.slice(0, sep);
+    (tags[ns] ||= []).push(key.slice(sep + 1));
+  }
+  return tags;
+}
+
+// Expands a `format=columnar` list payload (column header + row arrays, tags
+// as indices into a page-wide tag_table) back into the GalleryList shape the
+// pages consume, including `expand=group` members. Object-format payloads
+// pass through untouched.
+export function decodeGalleryList(payload) {
+  if (!payload?.columns) return payload;
+  const { columns, rows, tag_table: tagTable = [], groups, ...rest } = payload;
+  const decodeRow = (row) => {
+    const item = {};
+    columns.forEach((col, i) => { item[col] = row[i]; });
+    item.tags = decodeTags(item.tags, tagTable);
+    return item;
+  };
+  const decoded = { ...rest, items: rows.map(decodeRow) };
+  if (groups) {
+    decoded.groups = Object.fromEntries(
+      Object.entries(groups).map(([groupId, members]) => [groupId, members.map(decodeRow)]),
+    );
+  }
+  return decoded;
+}
@@ -1,6 +1,6 @@
 import test from 'node:test';
 import assert from 'node:assert/strict';
-import { buildGalleryRequestParams } from './galleryQuery.js';
+import { buildGalleryRequestParams, decodeGalleryList } from './galleryQuery.js';
 
 const filters = {
   category: 'Manga',
@@ -41,3 +41,56 @@ test('Favorites keeps gid pagination while preserving its scope', () => {
   assert.equal(params.is_favorited, true);
   assert.equal(params.min_rating, undefined);
 });
+
+test('Every list view inlines group members for GroupModal', () => {
+  for (const extra of [{}, { recommendedOnly: true }]) {
+    const params = buildGalleryRequestParams({ filters, page: 1, pageSize: 24, ...extra });
+    assert.equal(params.expand, 'group');
+  }
+});
+
+test('Columnar payloads decode rows and the shared tag table', () => {
+  const decoded = decodeGalleryList({
+    columns: ['gid', 'title', 'tags'],
+    rows: [
+      [2, 'b', [0, 1]],
+      [1, 'a', null],
+      [3, 'c', [1, 2]],
+    ],
+    tag_table: ['language:chinese', 'female:glasses', 'other:full color'],
+    total: 3,
+    page: 1,
+    size: 24,
+    pages: 1,
+  });
+  assert.equal(decoded.items.length, 3);
+  assert.equal(decoded.total, 3);
+  assert.equal(decoded.columns, undefined);
+  assert.deepEqual(decoded.items[0], {
+    gid: 2,
+    title: 'b',
+    tags: { language: ['chinese'], female: ['glasses'] },
+  });
+  assert.equal(decoded.items[1].tags, null);
+  assert.deepEqual(decoded.items[2].tags, { female: ['glasses'], other: ['full color'] });
+});
+
+test('Columnar group members share the page tag table', () => {
+  const decoded = decodeGalleryList({
+    columns: ['gid', 'group_id', 'tags'],
+    rows: [[2, 1, [0]]],
+    tag_table: ['language:chinese', 'language:english'],
+    groups: { 1: [[1, 1, [1]], [2, 1, [0]]] },
+    total: 1,
+    page: 1,
+    size: 24,
+    pages: 1,
+  });
+  assert.deepEqual(decoded.groups[1].map((g) => g.gid), [1, 2]);
+  assert.deepEqual(decoded.groups[1][0].tags, { language: ['english'] });
+});
+
+test('Object payloads pass through decodeGalleryList unchanged', () => {
+  const payload = { items: [{ gid: 1 }], total: 1, page: 1, size: 24, pages: 1 };
+  assert.equal(decodeGalleryList(payload), payload);
+});
@@ -112,6 +112,8 @@ const T = {
   'detail.tags': { 'zh-CN': '标签', 'zh-TW': '標籤', en: 'Tags' },
   'detail.versions': { 'zh-CN': '{count} 个版本', 'zh-TW': '{count} 個版本', en: '{count} versions' },
   'detail.similarity': { 'zh-CN': '偏好匹配 {value}', 'zh-TW': '偏好相符 {value}', en: '{value} preference match' },
+  'detail.similar': { 'zh-CN': '相似画廊', 'zh-TW': '相似畫廊', en: 'More like this' },
+  'detail.similar.hint': { 'zh-CN': '按标签相似度排列，不含同一作品的其他版本。', 'zh-TW': '依標籤相似度排列，不含同一作品的其他版本。', en: 'Ranked by tag similarity, excluding other versions of this work.' },
   'detail.comments.hint': { 'zh-CN': '上传者评论优先，其余按得分和原始顺序排列。', 'zh-TW': '上傳者評論優先，其餘依得分和原始順序排列。', en: 'Uploader comments appear first, followed by score and source order.' },
   'detail.comments.error': { 'zh-CN': '评论加载失败，画廊元数据仍可正常查看。', 'zh-TW': '評論載入失敗，畫廊中介資料仍可正常查看。', en: 'Comments could not be loaded. Gallery metadata is still available.' },
   'detail.comments.empty': { 'zh-CN': '尚未保存该画廊的评论。', 'zh-TW': '尚未儲存此畫廊的評論。', en: 'No saved comments for this gallery.' },
@@ -0,0 +1,110 @@
+-- 010_group_representatives.sql
+-- One representative gallery per version group, for collapse=group listings.
+--
+-- The representative is the member with the highest fav_count (newest
+-- posted_at, then highest gid, break ties) among active, non-replaced
+-- galleries — the same visibility rules the listing queries apply. Triggers
+-- keep it current as group membership and the ranking columns change, so the
+-- listing filter is a unique-index lookup instead of a per-request window
+-- function over every group.
+
+CREATE TABLE IF NOT EXISTS gallery_group_representatives (
+    group_id  BIGINT PRIMARY KEY,
+    gid       BIGINT NOT NULL UNIQUE
+);
+
+CREATE OR REPLACE FUNCTION refresh_group_representative(p_group_id BIGINT)
+RETURNS VOID LANGUAGE plpgsql AS $$
+DECLARE
+    best BIGINT;
+BEGIN
+    SELECT g.gid INTO best
+    FROM gallery_group_members ggm
+    JOIN eh_galleries g ON g.gid = ggm.gid
+    WHERE ggm.group_id = p_group_id
+      AND g.is_active = TRUE
+      AND g.parent_gid IS NULL
+    ORDER BY g.fav_count DESC NULLS LAST, g.posted_at DESC NULLS LAST, g.gid DESC
+    LIMIT 1;
+
+    IF best IS NULL THEN
+        DELETE FROM gallery_group_representatives WHERE group_id = p_group_id;
+        RETURN;
+    END IF;
+
+    -- A gid regrouped by the grouper may still represent its old group.
+    DELETE FROM gallery_group_representatives
+    WHERE gid = best AND group_id <> p_group_id;
+
+    INSERT INTO gallery_group_representatives (group_id, gid)
+    VALUES (p_group_id, best)
+    ON CONFLICT (group_id) DO UPDATE SET gid = EXCLUDED.gid
+    WHERE gallery_group_representatives.gid <> EXCLUDED.gid;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_group_members_representative()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_group_representative(OLD.group_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.group_id <> OLD.group_id) THEN
+        PERFORM refresh_group_representative(NEW.group_id);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS group_members_representative ON gallery_group_members;
+CREATE TRIGGER group_members_representative
+    AFTER INSERT OR UPDATE OR DELETE ON gallery_group_members
+    FOR EACH ROW EXECUTE FUNCTION trg_group_members_representative();
+
+-- GalleryGroupFullRebuild truncates the member table before reinserting;
+-- row triggers don't fire on TRUNCATE, so clear the representatives here and
+-- let the reinserts rebuild them.
+CREATE OR REPLACE FUNCTION trg_group_members_truncate_representative()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    TRUNCATE gallery_group_representatives;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS group_members_truncate_representative ON gallery_group_members;
+CREATE TRIGGER group_members_truncate_representative
+    AFTER TRUNCATE ON gallery_group_members
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_group_members_truncate_representative();
+
+CREATE OR REPLACE FUNCTION trg_galleries_representative()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+    gid_group BIGINT;
+BEGIN
+    SELECT group_id INTO gid_group FROM gallery_group_members WHERE gid = NEW.gid;
+    IF gid_group IS NOT NULL THEN
+        PERFORM refresh_group_representative(gid_group);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS galleries_representative ON eh_galleries;
+CREATE TRIGGER galleries_representative
+    AFTER UPDATE OF fav_count, posted_at, is_active, parent_gid ON eh_galleries
+    FOR EACH ROW
+    WHEN (OLD.fav_count IS DISTINCT FROM NEW.fav_count
+       OR OLD.posted_at IS DISTINCT FROM NEW.posted_at
+       OR OLD.is_active IS DISTINCT FROM NEW.is_active
+       OR OLD.parent_gid IS DISTINCT FROM NEW.parent_gid)
+    EXECUTE FUNCTION trg_galleries_representative();
+
+-- Backfill for databases that already have groups.
+INSERT INTO gallery_group_representatives (group_id, gid)
+SELECT DISTINCT ON (ggm.group_id) ggm.group_id, g.gid
+FROM gallery_group_members ggm
+JOIN eh_galleries g ON g.gid = ggm.gid
+WHERE g.is_active = TRUE AND g.parent_gid IS NULL
+ORDER BY ggm.group_id, g.fav_count DESC NULLS LAST, g.posted_at DESC NULLS LAST, g.gid DESC
+ON CONFLICT (group_id) DO UPDATE SET gid = EXCLUDED.gid;
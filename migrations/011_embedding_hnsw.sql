@@ -0,0 +1,14 @@
+-- 011_embedding_hnsw.sql
+-- HNSW index over gallery tag embeddings for "more like this" lookups
+-- (GET /v1/galleries/{gid}/similar). Cosine distance matches the <=> used by
+-- the profile similarity in 003_recommendation.sql.
+--
+-- Requires pgvector >= 0.7 (sparsevec HNSW support). sparsevec HNSW indexes
+-- accept up to 1000 non-zero elements per vector, far above any gallery's
+-- tag count. NULL embeddings (not yet embedded) are simply not indexed.
+--
+-- Recall/latency vs exact search: uv run bench/similar_recall.py
+
+CREATE INDEX IF NOT EXISTS idx_recommended_cache_embedding_hnsw
+    ON recommended_cache USING hnsw (tag_embedding sparsevec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,36 @@
+-- 012_named_profiles.sql
+-- Named recommendation profiles built from subsets of the favorites.
+--
+-- user_profile (id = 1) stays the default "For You" profile scored into
+-- recommended_cache.similarity. Each named profile selects the favorites
+-- matching its category list and tag filter, gets its own TF-IDF vector
+-- (same formula as RebuildUserProfile) and stores only its top_n scores in
+-- profile_similarity, so N profiles cost N * top_n rows instead of N extra
+-- columns on every recommended_cache row. Built by api/profiles.py.
+
+CREATE TABLE IF NOT EXISTS recommendation_profiles (
+    id           SERIAL PRIMARY KEY,
+    name         TEXT NOT NULL UNIQUE,
+    -- Favorites filter: category IN categories (empty = any) AND
+    -- tags @> tag_filter ('{}' matches everything).
+    categories   TEXT[] NOT NULL DEFAULT '{}',
+    tag_filter   JSONB NOT NULL DEFAULT '{}'::jsonb,
+    top_n        INTEGER NOT NULL DEFAULT 2000 CHECK (top_n BETWEEN 1 AND 100000),
+    embedding    sparsevec(65536),
+    liked_count  INTEGER NOT NULL DEFAULT 0,
+    scored_count INTEGER NOT NULL DEFAULT 0,
+    built_at     TIMESTAMPTZ,
+    created_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS profile_similarity (
+    profile_id INTEGER NOT NULL REFERENCES recommendation_profiles(id) ON DELETE CASCADE,
+    gid        BIGINT NOT NULL REFERENCES eh_galleries(gid),
+    similarity REAL NOT NULL,
+    PRIMARY KEY (profile_id, gid)
+);
+
+-- sort=recommended&profile=<name>: ORDER BY similarity DESC, gid DESC
+-- within one profile.
+CREATE INDEX IF NOT EXISTS idx_profile_similarity_rank
+    ON profile_similarity (profile_id, similarity DESC, gid DESC);
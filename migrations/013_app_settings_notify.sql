@@ -0,0 +1,30 @@
+-- 013_app_settings_notify.sql
+-- Announce app_settings changes so API processes can cache the table
+-- (api/settings_cache.py) instead of reading it on every request.
+--
+-- NOTIFY is transactional: listeners hear about a change only after the
+-- writing transaction commits, and never for a rolled-back one.
+
+CREATE OR REPLACE FUNCTION trg_app_settings_notify()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('app_settings_changed', '*');
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('app_settings_changed', OLD.key);
+    ELSE
+        PERFORM pg_notify('app_settings_changed', NEW.key);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS app_settings_notify ON app_settings;
+CREATE TRIGGER app_settings_notify
+    AFTER INSERT OR UPDATE OR DELETE ON app_settings
+    FOR EACH ROW EXECUTE FUNCTION trg_app_settings_notify();
+
+DROP TRIGGER IF EXISTS app_settings_notify_truncate ON app_settings;
+CREATE TRIGGER app_settings_notify_truncate
+    AFTER TRUNCATE ON app_settings
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_app_settings_notify();
@@ -0,0 +1,20 @@
+-- 014_similarity_notify.sql
+-- Announce recommended_cache.similarity changes so the API can keep an
+-- in-memory CDF for the admin threshold slider (api/similarity_cdf.py).
+--
+-- Statement-level, so a full recompute sends one notification per
+-- statement rather than one per row; Postgres also folds identical
+-- notifications within a transaction into one.
+
+CREATE OR REPLACE FUNCTION trg_similarity_notify()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('similarity_changed', TG_OP);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS recommended_cache_similarity_notify ON recommended_cache;
+CREATE TRIGGER recommended_cache_similarity_notify
+    AFTER INSERT OR DELETE OR UPDATE OF similarity ON recommended_cache
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_similarity_notify();
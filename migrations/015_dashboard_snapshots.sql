@@ -0,0 +1,16 @@
+-- 015_dashboard_snapshots.sql
+-- Precomputed dashboard counters (/v1/stats, /v1/admin/recommended/
+-- embeddings-status). Each key holds the endpoint's JSON body and the time
+-- it was computed; api/dashboard_snapshot.py refreshes stale keys in the
+-- background so polling the admin page is a primary-key lookup instead of
+-- full scans of eh_galleries and recommended_cache.
+--
+-- Refreshed rather than maintained by row triggers: the scraper upserts
+-- galleries in large batches and per-row counter updates would serialize
+-- them on a handful of hot rows.
+
+CREATE TABLE IF NOT EXISTS dashboard_snapshots (
+    key    TEXT PRIMARY KEY,
+    value  JSONB NOT NULL,
+    as_of  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
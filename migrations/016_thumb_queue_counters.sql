@@ -0,0 +1,158 @@
+-- 016_thumb_queue_counters.sql
+-- Incremental per-status counters for thumb_queue, plus archival of done rows.
+--
+-- thumb_queue_counts is an append-only ledger of (status, delta) rows
+-- written by statement-level triggers from their transition tables, so a
+-- bulk upsert adds one row per touched status instead of updating a shared
+-- counter row (which would serialize the scraper's upsert transaction
+-- against the thumb worker's claims). The current count is SUM(n) per
+-- status; compact_thumb_queue_counts() folds the ledger back to one row per
+-- status.
+--
+-- archive_done_thumbs() moves done rows out of thumb_queue into
+-- thumb_queue_archive so the queue's working set stays small. The gallery
+-- upsert re-inserts queue rows by gid, so a guard trigger drops inserts for
+-- archived gids whose thumb_url is unchanged (a changed URL un-archives the
+-- gid and queues it again).
+
+CREATE TABLE IF NOT EXISTS thumb_queue_counts (
+    id      BIGSERIAL PRIMARY KEY,
+    status  TEXT NOT NULL,
+    n       BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS thumb_queue_archive (
+    gid           BIGINT PRIMARY KEY,
+    thumb_url     TEXT NOT NULL,
+    processed_at  TIMESTAMPTZ,
+    archived_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION trg_thumb_queue_count_insert()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO thumb_queue_counts (status, n)
+    SELECT status, COUNT(*) FROM new_rows GROUP BY status;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_thumb_queue_count_delete()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO thumb_queue_counts (status, n)
+    SELECT status, -COUNT(*) FROM old_rows GROUP BY status;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_thumb_queue_count_update()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO thumb_queue_counts (status, n)
+    SELECT status, SUM(n)
+    FROM (
+        SELECT status, -1 AS n FROM old_rows
+        UNION ALL
+        SELECT status, 1 FROM new_rows
+    ) d
+    GROUP BY status
+    HAVING SUM(n) <> 0;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION compact_thumb_queue_counts()
+RETURNS VOID LANGUAGE sql AS $$
+    WITH gone AS (
+        DELETE FROM thumb_queue_counts RETURNING status, n
+    )
+    INSERT INTO thumb_queue_counts (status, n)
+    SELECT status, SUM(n) FROM gone GROUP BY status;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_thumb_queue_skip_archived()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+    archived_url TEXT;
+BEGIN
+    SELECT thumb_url INTO archived_url FROM thumb_queue_archive WHERE gid = NEW.gid;
+    IF NOT FOUND THEN
+        RETURN NEW;
+    END IF;
+    IF archived_url = NEW.thumb_url THEN
+        RETURN NULL;
+    END IF;
+    DELETE FROM thumb_queue_archive WHERE gid = NEW.gid;
+    INSERT INTO thumb_queue_counts (status, n) VALUES ('archived', -1);
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION archive_done_thumbs(p_older_than INTERVAL, p_limit INT)
+RETURNS INT LANGUAGE plpgsql AS $$
+DECLARE
+    moved INT;
+BEGIN
+    WITH batch AS (
+        DELETE FROM thumb_queue
+        WHERE id IN (
+            SELECT id FROM thumb_queue
+            WHERE status = 'done' AND processed_at < NOW() - p_older_than
+            ORDER BY processed_at
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING gid, thumb_url, processed_at
+    )
+    INSERT INTO thumb_queue_archive (gid, thumb_url, processed_at)
+    SELECT gid, thumb_url, processed_at FROM batch
+    ON CONFLICT (gid) DO UPDATE
+        SET thumb_url = EXCLUDED.thumb_url,
+            processed_at = EXCLUDED.processed_at,
+            archived_at = NOW();
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    IF moved > 0 THEN
+        INSERT INTO thumb_queue_counts (status, n) VALUES ('archived', moved);
+    END IF;
+    RETURN moved;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_thumb_queue_done
+    ON thumb_queue (processed_at) WHERE status = 'done';
+
+-- Install the triggers and seed the ledger atomically so no transition is
+-- counted twice or missed.
+BEGIN;
+LOCK TABLE thumb_queue IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS thumb_queue_count_insert ON thumb_queue;
+CREATE TRIGGER thumb_queue_count_insert
+    AFTER INSERT ON thumb_queue
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_thumb_queue_count_insert();
+
+DROP TRIGGER IF EXISTS thumb_queue_count_delete ON thumb_queue;
+CREATE TRIGGER thumb_queue_count_delete
+    AFTER DELETE ON thumb_queue
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_thumb_queue_count_delete();
+
+DROP TRIGGER IF EXISTS thumb_queue_count_update ON thumb_queue;
+CREATE TRIGGER thumb_queue_count_update
+    AFTER UPDATE ON thumb_queue
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_thumb_queue_count_update();
+
+DROP TRIGGER IF EXISTS thumb_queue_skip_archived ON thumb_queue;
+CREATE TRIGGER thumb_queue_skip_archived
+    BEFORE INSERT ON thumb_queue
+    FOR EACH ROW EXECUTE FUNCTION trg_thumb_queue_skip_archived();
+
+TRUNCATE thumb_queue_counts;
+INSERT INTO thumb_queue_counts (status, n)
+SELECT status, COUNT(*) FROM thumb_queue GROUP BY status;
+INSERT INTO thumb_queue_counts (status, n)
+SELECT 'archived', COUNT(*) FROM thumb_queue_archive;
+COMMIT;
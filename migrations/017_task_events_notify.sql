@@ -0,0 +1,17 @@
+-- 017_task_events_notify.sql
+-- Push sync_task_events to the API's event broker (api/event_broker.py)
+-- instead of every admin SSE client polling the table. The payload is just
+-- the new id; the broker fetches the row once for all subscribers.
+
+CREATE OR REPLACE FUNCTION trg_sync_task_events_notify()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('sync_task_events', NEW.id::text);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS sync_task_events_notify ON sync_task_events;
+CREATE TRIGGER sync_task_events_notify
+    AFTER INSERT ON sync_task_events
+    FOR EACH ROW EXECUTE FUNCTION trg_sync_task_events_notify();
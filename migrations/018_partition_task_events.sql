@@ -0,0 +1,222 @@
+-- 018_partition_task_events.sql
+-- Monthly range partitions for sync_task_events, with retention and
+-- compaction of old progress events into per-task daily summaries.
+--
+--   sync_task_events_pYYYYMM   one partition per month of created_at; the
+--                              current month and the next two always exist
+--                              (ensure_sync_task_event_partitions), anything
+--                              else lands in sync_task_events_default
+--   sync_task_event_summaries  (task_id, event_type, day) -> count, first/last
+--                              time and last payload of compacted events
+--
+-- maintain_sync_task_events() creates upcoming partitions, compacts progress
+-- events older than a week into summaries, and summarizes + drops partitions
+-- past retention. The API runs it hourly (api/maintenance.py).
+--
+-- The primary key becomes (id, created_at) because a unique constraint on a
+-- partitioned table must include the partition key; ids still come from the
+-- same sequence, so existing SSE resume cursors stay valid.
+
+CREATE TABLE IF NOT EXISTS sync_task_event_summaries (
+    task_id       INTEGER NOT NULL,    -- 0 for events not tied to a task
+    event_type    TEXT NOT NULL,
+    day           DATE NOT NULL,
+    event_count   BIGINT NOT NULL,
+    first_at      TIMESTAMPTZ NOT NULL,
+    last_at       TIMESTAMPTZ NOT NULL,
+    last_payload  JSONB NOT NULL DEFAULT '{}',
+    PRIMARY KEY (task_id, event_type, day)
+);
+
+-- ── Convert the existing table ───────────────────────────────────────────────
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'sync_task_events'
+    ) THEN
+        RETURN;
+    END IF;
+
+    LOCK TABLE sync_task_events IN ACCESS EXCLUSIVE MODE;
+    ALTER TABLE sync_task_events RENAME TO sync_task_events_legacy;
+    ALTER TABLE sync_task_events_legacy RENAME CONSTRAINT sync_task_events_pkey TO sync_task_events_legacy_pkey;
+    ALTER INDEX IF EXISTS idx_sync_task_events_created RENAME TO idx_sync_task_events_legacy_created;
+    ALTER SEQUENCE sync_task_events_id_seq OWNED BY NONE;
+
+    CREATE TABLE sync_task_events (
+        id          BIGINT NOT NULL DEFAULT nextval('sync_task_events_id_seq'),
+        task_id     INTEGER REFERENCES sync_task_defs(id) ON DELETE CASCADE,
+        job_id      BIGINT,
+        event_type  TEXT NOT NULL,
+        message     TEXT,
+        payload     JSONB NOT NULL DEFAULT '{}',
+        created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE TABLE sync_task_events_default PARTITION OF sync_task_events DEFAULT;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_sync_task_events_id
+    ON sync_task_events (id);
+CREATE INDEX IF NOT EXISTS idx_sync_task_events_type_id
+    ON sync_task_events (event_type, id DESC);
+CREATE INDEX IF NOT EXISTS idx_sync_task_events_created
+    ON sync_task_events (created_at, id);
+
+-- ── Partition management ─────────────────────────────────────────────────────
+
+CREATE OR REPLACE FUNCTION ensure_sync_task_event_partition(p_month DATE)
+RETURNS VOID LANGUAGE plpgsql AS $$
+DECLARE
+    lo    DATE := date_trunc('month', p_month)::date;
+    hi    DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    part  TEXT := format('sync_task_events_p%s', to_char(lo, 'YYYYMM'));
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    -- Rows for this month may already sit in the default partition; move
+    -- them into the new table before attaching it.
+    EXECUTE format('CREATE TABLE %I (LIKE sync_task_events INCLUDING DEFAULTS)', part);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM sync_task_events_default
+                        WHERE created_at >= %L AND created_at < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM moved',
+        lo, hi, part
+    );
+    EXECUTE format(
+        'ALTER TABLE sync_task_events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        part, lo, hi
+    );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION ensure_sync_task_event_partitions(p_months_ahead INT)
+RETURNS VOID LANGUAGE plpgsql AS $$
+BEGIN
+    FOR i IN 0..p_months_ahead LOOP
+        PERFORM ensure_sync_task_event_partition((date_trunc('month', NOW()) + make_interval(months => i))::date);
+    END LOOP;
+END;
+$$;
+
+-- Fold events created before p_before (of p_types, or every type when NULL)
+-- into sync_task_event_summaries and delete them. Returns rows removed.
+CREATE OR REPLACE FUNCTION compact_sync_task_events(p_before TIMESTAMPTZ, p_types TEXT[])
+RETURNS BIGINT LANGUAGE plpgsql AS $$
+DECLARE
+    removed BIGINT;
+BEGIN
+    WITH gone AS (
+        DELETE FROM sync_task_events
+        WHERE created_at < p_before
+          AND (p_types IS NULL OR event_type = ANY(p_types))
+        RETURNING id, task_id, event_type, payload, created_at
+    ),
+    agg AS (
+        SELECT COALESCE(task_id, 0) AS task_id,
+               event_type,
+               created_at::date AS day,
+               COUNT(*) AS event_count,
+               MIN(created_at) AS first_at,
+               MAX(created_at) AS last_at,
+               (array_agg(payload ORDER BY id DESC))[1] AS last_payload
+        FROM gone
+        GROUP BY 1, 2, 3
+    ),
+    upserted AS (
+        INSERT INTO sync_task_event_summaries AS s
+            (task_id, event_type, day, event_count, first_at, last_at, last_payload)
+        SELECT task_id, event_type, day, event_count, first_at, last_at, last_payload
+        FROM agg
+        ON CONFLICT (task_id, event_type, day) DO UPDATE SET
+            event_count  = s.event_count + EXCLUDED.event_count,
+            first_at     = LEAST(s.first_at, EXCLUDED.first_at),
+            last_at      = GREATEST(s.last_at, EXCLUDED.last_at),
+            last_payload = CASE WHEN EXCLUDED.last_at >= s.last_at
+                                THEN EXCLUDED.last_payload ELSE s.last_payload END
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO removed FROM gone;
+    RETURN removed;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION maintain_sync_task_events(
+    p_retain_months  INT DEFAULT 6,
+    p_compact_after  INTERVAL DEFAULT '7 days',
+    p_compact_types  TEXT[] DEFAULT ARRAY['task.updated', 'round.started', 'round.finished']
+)
+RETURNS JSONB LANGUAGE plpgsql AS $$
+DECLARE
+    cutoff     DATE := (date_trunc('month', NOW()) - make_interval(months => p_retain_months))::date;
+    compacted  BIGINT;
+    summarized BIGINT := 0;
+    dropped    TEXT[] := '{}';
+    part       RECORD;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('maintain_sync_task_events')) THEN
+        RETURN jsonb_build_object('skipped', TRUE);
+    END IF;
+
+    PERFORM ensure_sync_task_event_partitions(2);
+    compacted := compact_sync_task_events(NOW() - p_compact_after, p_compact_types);
+
+    FOR part IN
+        SELECT c.relname,
+               to_date(substr(c.relname, length('sync_task_events_p') + 1), 'YYYYMM') AS lo
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'sync_task_events'::regclass
+          AND c.relname ~ '^sync_task_events_p[0-9]{6}$'
+        ORDER BY c.relname
+    LOOP
+        EXIT WHEN part.lo >= cutoff;
+        summarized := summarized
+            + compact_sync_task_events((part.lo + INTERVAL '1 month')::timestamptz, NULL);
+        EXECUTE format('DROP TABLE %I', part.relname);
+        dropped := dropped || part.relname::text;
+    END LOOP;
+
+    RETURN jsonb_build_object(
+        'compacted', compacted,
+        'summarized_before_drop', summarized,
+        'dropped_partitions', to_jsonb(dropped)
+    );
+END;
+$$;
+
+-- ── Backfill ─────────────────────────────────────────────────────────────────
+
+DO $$
+DECLARE
+    m DATE;
+BEGIN
+    IF to_regclass('sync_task_events_legacy') IS NULL THEN
+        RETURN;
+    END IF;
+    FOR m IN
+        SELECT DISTINCT date_trunc('month', created_at)::date FROM sync_task_events_legacy
+    LOOP
+        PERFORM ensure_sync_task_event_partition(m);
+    END LOOP;
+    INSERT INTO sync_task_events (id, task_id, job_id, event_type, message, payload, created_at)
+    SELECT id, task_id, job_id, event_type, message, payload, created_at
+    FROM sync_task_events_legacy;
+    DROP TABLE sync_task_events_legacy;
+END;
+$$;
+
+ALTER SEQUENCE sync_task_events_id_seq OWNED BY sync_task_events.id;
+SELECT ensure_sync_task_event_partitions(2);
+
+-- The NOTIFY trigger from 017 belonged to the old table.
+DROP TRIGGER IF EXISTS sync_task_events_notify ON sync_task_events;
+CREATE TRIGGER sync_task_events_notify
+    AFTER INSERT ON sync_task_events
+    FOR EACH ROW EXECUTE FUNCTION trg_sync_task_events_notify();
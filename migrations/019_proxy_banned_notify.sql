@@ -0,0 +1,26 @@
+-- 019_proxy_banned_notify.sql
+-- Wake the proxy controller (api/proxy_controller.py) as soon as the scraper
+-- records a ban, instead of it polling sync_task_events every few seconds.
+-- The payload carries the event id and the ban duration so the controller
+-- can act without reading the row back.
+
+CREATE OR REPLACE FUNCTION trg_proxy_banned_notify()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify(
+        'proxy_banned',
+        json_build_object(
+            'id', NEW.id,
+            'duration_secs', NEW.payload->'duration_secs'
+        )::text
+    );
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS sync_task_events_proxy_banned ON sync_task_events;
+CREATE TRIGGER sync_task_events_proxy_banned
+    AFTER INSERT ON sync_task_events
+    FOR EACH ROW
+    WHEN (NEW.event_type = 'proxy.banned')
+    EXECUTE FUNCTION trg_proxy_banned_notify();
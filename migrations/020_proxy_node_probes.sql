@@ -0,0 +1,26 @@
+-- 020_proxy_node_probes.sql
+-- Per-node probe history for the proxy controller (api/proxy_controller.py).
+-- Every probe a scan makes is recorded here; the controller derives a
+-- recency-weighted health score and latency per node from it and probes the
+-- likeliest healthy, fastest nodes first. api/maintenance.py prunes rows
+-- past retention.
+
+CREATE TABLE IF NOT EXISTS proxy_node_probes (
+    id          BIGSERIAL PRIMARY KEY,
+    node        TEXT NOT NULL,
+    status      TEXT NOT NULL,         -- ok | banned | reachable | error
+    latency_ms  INTEGER,
+    via         TEXT,                  -- switch | standby | listener | delay
+    probed_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_proxy_node_probes_probed
+    ON proxy_node_probes (probed_at);
+
+CREATE OR REPLACE FUNCTION prune_proxy_node_probes(p_retain INTERVAL DEFAULT '30 days')
+RETURNS BIGINT LANGUAGE sql AS $$
+    WITH gone AS (
+        DELETE FROM proxy_node_probes WHERE probed_at < NOW() - p_retain RETURNING 1
+    )
+    SELECT COUNT(*) FROM gone;
+$$;
@@ -0,0 +1,16 @@
+-- 021_proxy_controller_state.sql
+-- Shared proxy controller state for multi-worker API deployments.
+--
+-- Only the process holding the proxy_controller advisory lock runs the
+-- controller (api/leader_lock.py). It keeps this single row up to date with
+-- its ProxyState snapshot so other workers can serve
+-- /v1/admin/proxy/status, and so a newly elected leader resumes with the
+-- previous one's ban cursor and scan cooldown. Other workers forward scan
+-- and switch requests to the leader with NOTIFY proxy_controller_command.
+
+CREATE TABLE IF NOT EXISTS proxy_controller_state (
+    id          SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    leader      TEXT NOT NULL,
+    snapshot    JSONB NOT NULL,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
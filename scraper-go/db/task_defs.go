@@ -237,9 +237,11 @@ func (d *DB) InsertTaskEvent(ctx context.Context, taskID int, jobID *int64, even
 		payload = map[string]any{}
 	}
 	payloadJSON, _ := json.Marshal(payload)
+	// taskID 0 marks events not tied to a task (e.g. proxy.banned); store
+	// NULL so the sync_task_defs foreign key doesn't reject them.
 	_, err := d.pool.Exec(ctx, `
 		INSERT INTO sync_task_events (task_id, job_id, event_type, message, payload)
-		VALUES ($1, $2, $3, $4, $5::jsonb)
+		VALUES (NULLIF($1, 0), $2, $3, $4, $5::jsonb)
 	`, taskID, jobID, eventType, message, string(payloadJSON))
 	return err
 }